@@ -0,0 +1,141 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import scipy.sparse
+
+
+#######################################
+# Airport index registry ##############
+#######################################
+
+
+class AirportIndex:
+    """
+    Registry mapping ICAO codes to stable integer row/column indices of airport matrices.
+
+    Indices never change once assigned: loading a saved index and extending it with new
+    airports appends them at the end, so matrices built in different runs line up.
+
+    Args:
+        codes (iterable): ICAO codes in index order; duplicates are dropped.
+    """
+
+    def __init__(self, codes):
+        self.index = {code: i for i, code in enumerate(dict.fromkeys(codes))}
+        self.codes = pd.Index(list(self.index), dtype=object)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self.index
+
+    def get_indexer(self, codes):
+        """
+        Look up the indices of many ICAO codes at once.
+
+        Args:
+            codes (array-like): ICAO codes.
+
+        Returns:
+            np.ndarray: The index of every code, -1 for codes not in the registry.
+        """
+        if isinstance(getattr(codes, 'dtype', None), pd.CategoricalDtype):
+            # Look up every category once and expand by the category codes
+            category_index = np.append(self.get_indexer(codes.cat.categories), -1)
+            return category_index[codes.cat.codes.to_numpy()]
+        codes = codes.tolist() if hasattr(codes, 'tolist') else list(codes)
+        return np.fromiter((self.index.get(code, -1) for code in codes), dtype=np.int64, count=len(codes))
+
+    def extend(self, codes):
+        """Return a new index with the codes not yet registered appended in sorted order."""
+        new_codes = sorted(set(codes) - set(self.index))
+        return AirportIndex(list(self.codes) + new_codes)
+
+    def save(self, path):
+        np.savez(path, codes=np.array(self.codes, dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        return cls(np.load(path)['codes'])
+
+    @classmethod
+    def load_or_create(cls, path, codes):
+        """
+        Load the registry saved at path and extend it with codes, or create it from the sorted codes.
+
+        The (possibly extended) registry is saved back to path.
+        """
+        path = Path(path)
+        index = cls.load(path).extend(codes) if path.exists() else cls(sorted(set(codes)))
+        index.save(path)
+        return index
+
+
+#######################################
+# Labelled sparse matrices ############
+#######################################
+
+"""
+    Matrices are stored like the panel's seat matrices: the CSR matrix in
+    {name}.npz and its row and column ICAO labels in {name}_labels.npz
+    (arrays 'rows' and 'cols').
+
+    Every file is written to a temporary file in the same folder and then
+    moved into place, so a reader never sees a partially written file.
+"""
+
+
+def replace_atomically(path, write):
+    """
+    Write a file through a temporary file and move it into place in one step.
+
+    Args:
+        path (str or Path): The target file.
+        write (callable): Called with the open temporary file to write its content.
+    """
+    path = Path(path)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False) as f:
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def save_labeled_matrix(path, matrix, row_labels, col_labels=None):
+    """
+    Save a sparse matrix with its airport labels.
+
+    Args:
+        path (str or Path): Target path without extension, e.g. "airport_data/seat_matrix_2024-04".
+        matrix (scipy.sparse matrix): The matrix to save; stored as CSR.
+        row_labels (array-like): ICAO codes of the rows.
+        col_labels (array-like, optional): ICAO codes of the columns. Defaults to row_labels.
+    """
+    path = Path(path)
+    col_labels = row_labels if col_labels is None else col_labels
+    replace_atomically(path.with_name(f"{path.name}.npz"),
+                       lambda f: scipy.sparse.save_npz(f, scipy.sparse.csr_matrix(matrix)))
+    replace_atomically(path.with_name(f"{path.name}_labels.npz"),
+                       lambda f: np.savez(f, rows=np.array(row_labels, dtype=str), cols=np.array(col_labels, dtype=str)))
+
+
+def load_labeled_matrix(path):
+    """
+    Load a sparse matrix saved with save_labeled_matrix.
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix, row labels, column labels).
+    """
+    path = Path(path)
+    labels = np.load(path.with_name(f"{path.name}_labels.npz"), allow_pickle=True)
+    return scipy.sparse.load_npz(path.with_name(f"{path.name}.npz")).tocsr(), labels['rows'], labels['cols']
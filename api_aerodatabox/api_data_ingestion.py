@@ -1,16 +1,14 @@
-import requests
 import json
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 from pathlib import Path
-import time
 
 # Determine the current directory
 current_directory = Path(__file__).resolve().parent
 
 # Import the module
 import api_utlitities
-headers = api_utlitities.headers
+from crawl_manifest import CrawlManifest
 
 # Define paths
 config_path = current_directory / "config.toml"
@@ -18,43 +16,54 @@ airport_path = current_directory / "airport_data" / "available_airports.json"
 connection_data_directory = current_directory / "connection_data"
 airports_info_directory = current_directory / "airport_data" / "airports_detail_data"
 
-# Check if the airports_info directory already exists
-if airports_info_directory.exists():
-    print(f"The directory 'airports_detail_data' already exists at {airports_info_directory}. Exiting program.")
-    exit()
+# Load the crawl manifest so completed requests of a previous run are skipped
+manifest = CrawlManifest()
 
-# Create the airports_info directory since it does not exist
-airports_info_directory.mkdir(parents=True)
+# Create the airports_info directory if it does not exist yet
+airports_info_directory.mkdir(parents=True, exist_ok=True)
 
 # Read the JSON file containing ICAO codes
 with open(airport_path, 'r') as f:
     airports_icao = json.load(f)
 
-# Fetch data from the API and write to JSON files
-for icao in airports_icao['items']:
-    url = f"https://aerodatabox.p.rapidapi.com/airports/icao/{icao}"
-    response = requests.get(url, headers=headers)
 
-    # Check if the request was successful
-    if response.status_code == 200:
-        file_path = airports_info_directory / f"{icao}.json"
+# Function to fetch a list of crawl units and record their outcome in the manifest
+def fetch_pending(units):
+    """
+    Fetch all crawl units that are not yet marked as done in the manifest.
 
-        # Write the JSON response to a file
-        with open(file_path, "w") as file:
-            file.write(response.text)
-        print("JSON data saved to:", file_path)
-    else:
-        print("Failed to retrieve data from the API:", response.status_code)
+    Args:
+        units (list): Tuples of ((endpoint, airport, window), url, file_path).
+    """
+    pending = [unit for unit in units if not manifest.is_done(*unit[0])]
+    print(f"{len(units) - len(pending)} of {len(units)} requests already completed, fetching {len(pending)}...")
+
+    def checkpoint(index, status):
+        key = pending[index][0]
+        if status == 200:
+            manifest.mark_done(*key, status_code=status)
+        else:
+            manifest.mark_failed(*key, status_code=status)
+
+    api_utlitities.fetch_all_to_files(
+        [(url, file_path, None) for _, url, file_path in pending],
+        on_complete=checkpoint,
+    )
 
-    # Delay for 0.6 seconds to avoid hitting the rate limit
-    time.sleep(0.6)
 
+# Fetch data from the API concurrently and write to JSON files
+airport_units = [
+    (("airports", icao, None),
+     f"https://aerodatabox.p.rapidapi.com/airports/icao/{icao}",
+     airports_info_directory / f"{icao}.json")
+    for icao in airports_icao['items']
+]
+fetch_pending(airport_units)
 
-# Function to get airport routes for a specific ICAO code and date
-def get_airport_routes(icao_code, date):
-    url = f"https://aerodatabox.p.rapidapi.com/airports/icao/{icao_code}/stats/routes/daily/{date}"
-    response = requests.get(url, headers=headers)
-    return response.json() if response.status_code == 200 else None
+
+# Function to get the routes endpoint for a specific ICAO code and date
+def get_airport_routes_url(icao_code, date):
+    return f"https://aerodatabox.p.rapidapi.com/airports/icao/{icao_code}/stats/routes/daily/{date}"
 
 
 # Function to create a folder for each month within the connection_data_directory
@@ -78,19 +87,21 @@ with open(airport_path, "r") as airports_file:
 start_date = datetime(year=2023, month=5, day=7)
 end_date = datetime(year=2024, month=5, day=7)
 
-# Retrieve and save data
+# Collect the requests for every month and airport
+route_units = []
 while start_date <= end_date:
     month_folder = create_month_folder(connection_data_directory, start_date)
     date_str = start_date.strftime("%Y-%m-%d")
-    print(f"Retrieving data for {date_str}...")
     for airport_icao in airports_dataset["items"]:
-        airport_routes = get_airport_routes(airport_icao, date_str)
-        if airport_routes:
-            file_path = month_folder / f"{airport_icao}.json"
-            with open(file_path, "w") as json_file:
-                json.dump(airport_routes, json_file)
-            print(f"Data for airport {airport_icao} saved successfully.")
-        else:
-            print(f"Failed to retrieve data for airport {airport_icao}.")
+        route_units.append((("stats/routes/daily", airport_icao, date_str),
+                            get_airport_routes_url(airport_icao, date_str),
+                            month_folder / f"{airport_icao}.json"))
     start_date += relativedelta(months=1)
     start_date = start_date.replace(day=7)
+
+# Retrieve and save data
+fetch_pending(route_units)
+
+failed_units = manifest.failed()
+if failed_units:
+    print(f"{len(failed_units)} requests failed and will be retried on the next run.")
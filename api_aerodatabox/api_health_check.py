@@ -1,4 +1,3 @@
-import requests
 from pathlib import Path
 
 # Determine the current directory
@@ -6,14 +5,13 @@ current_directory = Path(__file__).resolve().parent
 
 # Now you can import the module
 import api_utlitities
-headers = api_utlitities.headers
 
 url = "https://aerodatabox.p.rapidapi.com/health/services/feeds/FlightSchedules/airports"
 
-response = requests.get(url, headers=headers)
+response = api_utlitities.get(url)
 
 # Check if the request was successful
-if response.status_code == 200:
+if response is not None and response.status_code == 200:
 
     # Get the current directory
     file_path = current_directory / "airport_data/available_airports.json"
@@ -24,4 +22,4 @@ if response.status_code == 200:
 
     print("JSON data saved to:", file_path)
 else:
-    print("Failed to retrieve data from the API:", response.status_code)
+    print("Failed to retrieve data from the API:", response.status_code if response is not None else "no response")
@@ -1,4 +1,11 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
 import toml
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 
 # Determine the current directory
@@ -19,9 +26,272 @@ def get_api_key():
         return None
 
 
+def get_rate_limit():
+    """
+    Read the request rate and concurrency limits from the [rate_limit] section of config.toml.
+
+    Returns:
+        tuple: (requests_per_second, max_concurrent_requests). Falls back to the
+               defaults of config.toml (1.6 requests per second, 4 concurrent
+               requests) if the section is missing.
+    """
+    config_path = current_directory / "config.toml"
+    try:
+        with open(config_path, "r") as config_file:
+            rate_limit = toml.load(config_file).get("rate_limit", {})
+    except FileNotFoundError:
+        rate_limit = {}
+    return (float(rate_limit.get("requests_per_second", 1.6)),
+            int(rate_limit.get("max_concurrent_requests", 4)))
+
+
 api_key = get_api_key()
+requests_per_second, max_concurrent_requests = get_rate_limit()
 
 headers = {
     "X-RapidAPI-Key": api_key,
     "X-RapidAPI-Host": "aerodatabox.p.rapidapi.com"
 }
+
+
+#######################################
+# Rate limiting #######################
+#######################################
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter matched to the RapidAPI quota of the subscribed tier.
+
+    Tokens are refilled continuously at `rate` per second up to `capacity`; every
+    request consumes one token and waits until one is available. When the API
+    reports a rate limit, hold() drains the bucket and pauses every request
+    sharing it, not only the one that was rejected.
+
+    Args:
+        rate (float): Sustained number of requests per second.
+        capacity (int, optional): Maximum burst size. Defaults to 1 (no bursts).
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.held_until = self.updated
+
+    def hold(self, seconds):
+        """Drain the bucket and hand out no tokens for the given number of seconds."""
+        now = time.monotonic()
+        self.held_until = max(self.held_until, now + seconds)
+        self.tokens = 0
+        self.updated = self.held_until
+
+    def _take(self):
+        """Consume a token if one is available, otherwise return the seconds to wait for one."""
+        now = time.monotonic()
+        if now < self.held_until:
+            return self.held_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while (delay := self._take()) > 0:
+            await asyncio.sleep(delay)
+
+    def wait(self):
+        while (delay := self._take()) > 0:
+            time.sleep(delay)
+
+
+#######################################
+# Retry policy ########################
+#######################################
+
+# Responses worth retrying: rate limiting and transient server errors
+retry_status_codes = {429, 500, 502, 503, 504}
+max_retries = 5
+backoff_base = 1.0  # seconds
+backoff_max = 60.0  # seconds
+
+
+def is_rate_limited(status, response_headers=None):
+    """Return True if a response reports the rate limit, so every request should pause."""
+    return status == 429 or "Retry-After" in (response_headers or {})
+
+
+def retry_delay(attempt, response_headers=None):
+    """
+    Compute how long to wait before retrying a request.
+
+    The server's Retry-After header (seconds or HTTP date) is honoured if present; if the
+    RapidAPI rate-limit headers report an exhausted window, the reset time is used.
+    Otherwise the delay is an exponential backoff with full jitter.
+
+    Args:
+        attempt (int): Number of the failed attempt, starting at 0.
+        response_headers (Mapping, optional): Headers of the failed response.
+
+    Returns:
+        float: The delay in seconds.
+    """
+    response_headers = response_headers or {}
+    retry_after = response_headers.get("Retry-After")
+    if retry_after is not None:
+        try:
+            return min(backoff_max, float(retry_after))
+        except ValueError:
+            try:
+                return min(backoff_max, max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+    if response_headers.get("X-RateLimit-Requests-Remaining") == "0":
+        try:
+            return min(backoff_max, float(response_headers.get("X-RateLimit-Requests-Reset")))
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, min(backoff_max, backoff_base * 2 ** attempt))
+
+
+#######################################
+# Shared HTTP client ##################
+#######################################
+
+
+def create_session(pool_size=max_concurrent_requests):
+    """
+    Create a requests session with keep-alive connection pooling and gzip transfer encoding.
+
+    Args:
+        pool_size (int, optional): Number of pooled connections per host.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    session = requests.Session()
+    session.headers.update(headers)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    return session
+
+
+session = create_session()
+rate_limiter = TokenBucket(requests_per_second)
+
+
+def get(url, params=None, timeout=30):
+    """
+    Send a rate-limited GET request through the shared session, retrying 429 and 5xx responses.
+
+    Args:
+        url (str): The endpoint to request.
+        params (dict, optional): Query string parameters.
+        timeout (float, optional): Timeout per attempt in seconds.
+
+    Returns:
+        requests.Response: The final response, which may still be unsuccessful once the
+                           retries are exhausted. None if every attempt raised.
+    """
+    for attempt in range(max_retries + 1):
+        rate_limiter.wait()
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except requests.RequestException as e:
+            print(f"Request to {url} failed: {e}")
+            if attempt == max_retries:
+                return None
+            time.sleep(retry_delay(attempt))
+            continue
+
+        if response.status_code not in retry_status_codes or attempt == max_retries:
+            return response
+        delay = retry_delay(attempt, response.headers)
+        print(f"Received {response.status_code} for {url}, retrying in {delay:.1f} s...")
+        if is_rate_limited(response.status_code, response.headers):
+            rate_limiter.hold(delay)
+        time.sleep(delay)
+
+
+#######################################
+# Concurrent fetching #################
+#######################################
+
+
+async def _fetch_to_file(session, semaphore, bucket, url, file_path, params=None):
+    for attempt in range(max_retries + 1):
+        async with semaphore:
+            await bucket.acquire()
+            try:
+                async with session.get(url, params=params) as response:
+                    text = await response.text()
+                    status = response.status
+                    response_headers = response.headers
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Request to {url} failed: {e}")
+                status = None
+                response_headers = None
+                if attempt == max_retries:
+                    return None
+
+        if status is not None and (status not in retry_status_codes or attempt == max_retries):
+            break
+        delay = retry_delay(attempt, response_headers)
+        print(f"Received {status} for {url}, retrying in {delay:.1f} s...")
+        if is_rate_limited(status, response_headers):
+            bucket.hold(delay)  # Pause the other requests in flight as well
+        await asyncio.sleep(delay)
+
+    if status == 200:
+        with open(file_path, "w") as file:
+            file.write(text)
+        print("JSON data saved to:", file_path)
+    else:
+        print(f"Failed to retrieve data from the API for {url}: {status}")
+    return status
+
+
+async def _fetch_all_to_files(jobs, rate, concurrency, on_complete):
+    bucket = TokenBucket(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async def run_job(index, url, file_path, params):
+        status = await _fetch_to_file(session, semaphore, bucket, url, file_path, params)
+        if on_complete is not None:
+            on_complete(index, status)
+        return status
+
+    async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+        return await asyncio.gather(*(
+            run_job(index, url, file_path, params)
+            for index, (url, file_path, params) in enumerate(jobs)
+        ))
+
+
+def fetch_all_to_files(jobs, rate=None, concurrency=None, on_complete=None):
+    """
+    Fetch many API endpoints concurrently and write every successful response to disk.
+
+    Args:
+        jobs (list): Tuples of (url, file_path, params) to fetch; params may be None.
+        rate (float, optional): Requests per second. Defaults to the configured quota.
+        concurrency (int, optional): Maximum number of requests in flight. Defaults
+                                     to the configured limit.
+        on_complete (callable, optional): Called as on_complete(job_index, status_code)
+                                          as soon as each job finishes, e.g. to
+                                          checkpoint progress.
+
+    Returns:
+        list: The HTTP status code of every job (None if the request raised), in job order.
+    """
+    return asyncio.run(_fetch_all_to_files(
+        jobs,
+        rate or requests_per_second,
+        concurrency or max_concurrent_requests,
+        on_complete,
+    ))
@@ -1,59 +1,68 @@
-import os
-import json
-import pandas as pd
-from scipy.sparse import csr_matrix, save_npz
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
-# Base directory containing all the monthly folders
-base_directory = '.'
+import numpy as np
+from scipy.sparse import csr_matrix
+
+import movement_store
+from airport_index import AirportIndex, save_labeled_matrix
 
 # List of month folders
 month_folders = [f'{i:02d}-{month}' for i, month in enumerate(
     ["January", "February", "March", "April", "May", "June",
      "July", "August", "September", "October", "November", "December"], 1)]
 
-# Function to update the matrix
-def update_matrix(data, origin, destination, avg_daily_flights):
-    data[origin][destination] += float(avg_daily_flights)
-
-# Loop through each monthly folder
-for month_folder in month_folders:
-    directory = os.path.join(base_directory, month_folder)
-    
-    # Initialize an empty dictionary for the matrix data
-    data = defaultdict(lambda: defaultdict(float))
-    
-    if os.path.exists(directory) and os.path.isdir(directory):
-        # Loop through all JSON files in the directory
-        file_list = [f for f in os.listdir(directory) if f.endswith('.json')]
-        
-        for i, filename in enumerate(file_list):
-            origin = filename.split('.')[0]
-            filepath = os.path.join(directory, filename)
-            
-            with open(filepath, 'r') as file:
-                try:
-                    data_json = json.load(file)
-                    for route in data_json.get('routes', []):
-                        destination_info = route.get('destination', {})
-                        destination = destination_info.get('icao')
-                        avg_daily_flights = route.get('averageDailyFlights')
-                        if destination and avg_daily_flights is not None:
-                            update_matrix(data, origin, destination, avg_daily_flights)
-                except json.JSONDecodeError:
-                    print(f"Error decoding JSON from file {filename}")
-            
-            # Save the matrix periodically
-            if (i + 1) % 100 == 0 or (i + 1) == len(file_list):
-                print(f'Processed {i + 1}/{len(file_list)} files in {month_folder}...')
-        
-        # Create DataFrame from the data dictionary
-        matrix_df = pd.DataFrame.from_dict(data, orient='index').fillna(0).astype(pd.SparseDtype("float", 0))
-        
-        # Convert DataFrame to sparse matrix and save
-        sparse_matrix = csr_matrix(matrix_df.sparse.to_coo())
-        save_npz(f'{month_folder}.npz', sparse_matrix)
-        
-        print(f'Saved matrix for {month_folder}.')
-
-print('All files processed successfully.')
+# Number of worker processes building the monthly matrices, None uses every CPU
+workers = None
+
+
+def month_matrix(month_folder, airport_codes):
+    """
+    Build the average daily flights matrix of one month.
+
+    Args:
+        month_folder (str): Name of the month partition, e.g. "04-April".
+        airport_codes (list): ICAO codes of the matrix rows and columns.
+
+    Returns:
+        csr_matrix: The summed average daily flights per origin and destination, None if the month has no routes.
+    """
+    # Read only the needed columns of this month's partition
+    routes_df = movement_store.read_routes(columns=['origin', 'destination', 'average_daily_flights'],
+                                           months=[month_folder])
+    routes_df = routes_df.dropna(subset=['destination', 'average_daily_flights'])
+    if routes_df.empty:
+        return None
+
+    print(f'Loaded {len(routes_df)} routes of {routes_df["origin"].nunique()} airports in {month_folder}...')
+
+    # Sum the average daily flights per origin and destination (duplicates are summed by the CSR constructor)
+    airport_index = AirportIndex(airport_codes)
+    rows = airport_index.get_indexer(routes_df['origin'])
+    cols = airport_index.get_indexer(routes_df['destination'])
+    return csr_matrix((routes_df['average_daily_flights'].to_numpy(dtype=np.float64), (rows, cols)),
+                      shape=(len(airport_index), len(airport_index)))
+
+
+if __name__ == "__main__":
+    # Convert the months of connection_data that are new or changed since the last conversion
+    stale_months = movement_store.stale_connection_months()
+    if stale_months:
+        movement_store.convert_connection_data(months=stale_months)
+
+    # Register every airport of the store once, so all monthly matrices share the same rows and columns
+    all_routes_df = movement_store.read_routes(columns=['origin', 'destination'])
+    airport_index = AirportIndex.load_or_create(
+        'airport_index.npz', set(all_routes_df['origin'].dropna()) | set(all_routes_df['destination'].dropna()))
+
+    # Build the months in parallel; results come back in month order
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        matrices = executor.map(month_matrix, month_folders, repeat(list(airport_index.codes)))
+
+        for month_folder, sparse_matrix in zip(month_folders, matrices):
+            if sparse_matrix is not None:
+                # Save the sparse matrix with its airport labels
+                save_labeled_matrix(month_folder, sparse_matrix, airport_index.codes)
+                print(f'Saved matrix for {month_folder}.')
+
+    print('All files processed successfully.')
@@ -0,0 +1,71 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+# Ensure the api_aerodatabox module path is added
+current_directory = Path(__file__).resolve().parent
+sys.path.insert(0, str(current_directory.parents[0]))
+
+import payloads
+from departures_io import airport_files, iter_departures
+
+"""
+    Compares decoding the departure files in airport_data with the standard
+    json module and .get() chains against the typed payloads decoding layer.
+    Both extract the fields the matrix generators use from every departure.
+
+    Usage: python benchmark_decoding.py
+"""
+
+folder_path = current_directory / "airport_data"
+
+
+def _get(record, key):
+    return record.get(key) if isinstance(record, dict) else None
+
+
+def extract_stdlib(file_path):
+    """Decode one airport file with json and walk the nested dicts."""
+    with open(file_path, "r") as f:
+        if file_path.suffix == ".json":
+            departures = json.load(f)
+        else:
+            departures = [departure for line in f for departure in json.loads(line)["departures"]]
+    fields = []
+    for departure in departures:
+        movement = departure.get("movement", {})
+        fields.append((_get(_get(movement, "airport"), "icao"),
+                       _get(_get(movement, "scheduledTime"), "utc"),
+                       _get(departure.get("aircraft"), "model")))
+    return fields
+
+
+def extract_payloads(file_path):
+    """Decode one airport file with the payloads layer and read the fields with payloads.value."""
+    value = payloads.value
+    return [(value(value(value(departure, "movement"), "airport"), "icao"),
+             value(value(value(departure, "movement"), "scheduledTime"), "utc"),
+             value(value(departure, "aircraft"), "model"))
+            for departure in iter_departures(file_path)]
+
+
+def benchmark(extract, files):
+    start = time.perf_counter()
+    fields = [extract(file_path) for file_path in files]
+    return time.perf_counter() - start, fields
+
+
+files = list(airport_files(folder_path).values())
+print(f"Decoding {len(files)} airport files from {folder_path} ...")
+
+stdlib_time, stdlib_fields = benchmark(extract_stdlib, files)
+payloads_time, payloads_fields = benchmark(extract_payloads, files)
+
+assert stdlib_fields == payloads_fields, "Both decoders must extract the same fields"
+departures = sum(len(fields) for fields in stdlib_fields)
+
+print(f"{departures} departures")
+print(f"json + .get() chains:   {stdlib_time:6.2f} s")
+print(f"payloads ({payloads.backend}): {payloads_time:6.2f} s")
+print(f"Speedup: {stdlib_time / payloads_time:.1f}x")
@@ -1,8 +1,16 @@
-import requests
-import json
+import sys
 from datetime import datetime, timedelta
 from pathlib import Path
-import time
+
+# Ensure the api_aerodatabox module path is added
+current_directory = Path(__file__).resolve().parent
+api_aerodatabox_path = current_directory.parents[0]
+sys.path.insert(0, str(api_aerodatabox_path))
+
+import api_utlitities
+import payloads
+from crawl_manifest import CrawlManifest
+from departures_io import append_window
 
 # Function to generate time intervals
 def generate_time_intervals(start_date, end_date, delta):
@@ -15,6 +23,7 @@ def generate_time_intervals(start_date, end_date, delta):
 airports = ["DNMM", "DNAA", "KLAX", "KSFO", "YMML", "YSSY"]
 
 # API details
+endpoint = "flights/airports"
 base_url = "https://aerodatabox.p.rapidapi.com/flights/airports/icao/{airport}/{start}/{end}"
 querystring = {
     "withLeg": "false",
@@ -25,10 +34,6 @@ querystring = {
     "withPrivate": "false",
     "withLocation": "false"
 }
-headers = {
-    "X-RapidAPI-Key": "c07e00441amsh554a1379c06b08ep14e438jsnf5d2fca5cd7e",
-    "X-RapidAPI-Host": "aerodatabox.p.rapidapi.com"
-}
 
 # Time interval settings
 start_date = datetime(2023, 5, 25)
@@ -36,24 +41,37 @@ end_date = datetime(2024, 5, 23)
 time_interval = timedelta(hours=12)
 
 # Create output directory if it doesn't exist
-output_dir = Path("airport_data")
+output_dir = current_directory / "airport_data"
 output_dir.mkdir(exist_ok=True)
 
+# Load the crawl manifest so windows fetched by a previous run are skipped
+manifest = CrawlManifest()
+
+
 # Fetch and store data
 for airport in airports:
-    data = []
+    # Every window is streamed to disk as soon as it arrives, so a crash loses at most one window
+    output_file = output_dir / f"{airport}.jsonl"
     for start, end in generate_time_intervals(start_date, end_date, time_interval):
         start_str = start.strftime("%Y-%m-%dT%H:%M")
         end_str = end.strftime("%Y-%m-%dT%H:%M")
+        window = f"{start_str}/{end_str}"
+        if manifest.is_done(endpoint, airport, window):
+            continue
         url = base_url.format(airport=airport, start=start_str, end=end_str)
-        
+
         # Print the current API call
         print(f"Making API call for {airport} from {start_str} to {end_str}")
-        
-        response = requests.get(url, headers=headers, params=querystring)
-        if response.status_code == 200:
+
+        # The shared client rate-limits the request and retries 429 and 5xx responses
+        response = api_utlitities.get(url, params=querystring)
+        if response is None:
+            print(f"Failed to fetch data for {airport} from {start_str} to {end_str}: no response")
+            manifest.mark_failed(endpoint, airport, window)
+        elif response.status_code == 200:
             try:
-                json_data = response.json()
+                json_data = payloads.loads(response.content)
+                data = []
                 if "departures" in json_data:
                     for departure in json_data["departures"]:
                         filtered_data = {
@@ -67,17 +85,13 @@ for airport in airports:
                         data.append(filtered_data)
                 else:
                     print(f"No departures data for {airport} from {start_str} to {end_str}")
-            except json.JSONDecodeError:
+                append_window(output_file, window, data)
+                manifest.mark_done(endpoint, airport, window, status_code=response.status_code)
+            except payloads.DecodeError:
                 print(f"Failed to parse JSON for {airport} from {start_str} to {end_str}")
+                manifest.mark_failed(endpoint, airport, window, status_code=response.status_code)
         else:
             print(f"Failed to fetch data for {airport} from {start_str} to {end_str}: {response.status_code}")
-
-        # Wait for 0.5 seconds before making the next request
-        time.sleep(0.5)
-
-    # Save data to JSON file
-    output_file = output_dir / f"{airport}.json"
-    with open(output_file, "w") as f:
-        json.dump(data, f, indent=4)
+            manifest.mark_failed(endpoint, airport, window, status_code=response.status_code)
 
 print("Data fetching complete.")
@@ -0,0 +1,133 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+import json
+from pathlib import Path
+
+import payloads
+
+
+#######################################
+# Streaming departures storage ########
+#######################################
+
+"""
+    Departures of an airport are stored as JSON Lines, one line per fetched
+    12-hour window, so every window can be appended as soon as it arrives and
+    nothing has to be held in memory:
+
+        airport_data/{ICAO_CODE}.jsonl:
+        {"window": "2023-05-25T00:00/2023-05-25T12:00", "departures": [{"movement": {...}, "aircraft": {...}, "airline": {...}}, ...]}
+        {"window": "2023-05-25T12:00/2023-05-26T00:00", "departures": [...]}
+
+    A window written twice (e.g. refetched after a crash before it was
+    checkpointed) is only read once, and a line truncated by a crash is
+    skipped. Legacy pretty-printed {ICAO_CODE}.json files holding a flat list
+    of departures are read as well.
+
+    Departures are read into the typed payloads.Departure schema, or into
+    plain dicts without msgspec; read their fields with payloads.value.
+"""
+
+
+def append_window(file_path, window, departures):
+    """
+    Append the departures of one time window to an airport's JSON Lines file.
+
+    Args:
+        file_path (Path): The {ICAO_CODE}.jsonl file of the airport.
+        window (str): The time window of the departures, e.g. "2023-05-25T00:00/2023-05-25T12:00".
+        departures (list): The departures of that window.
+    """
+    with open(file_path, "a") as f:
+        f.write(json.dumps({"window": window, "departures": departures}, separators=(",", ":")) + "\n")
+
+
+def iter_departures(file_path):
+    """
+    Yield the departures stored in an airport file one by one.
+
+    Args:
+        file_path (Path): A {ICAO_CODE}.jsonl or legacy {ICAO_CODE}.json file.
+
+    Yields:
+        payloads.Departure: The stored departures in the order their windows were fetched.
+    """
+    file_path = Path(file_path)
+    if file_path.suffix == ".json":
+        try:
+            with open(file_path, "rb") as f:
+                yield from payloads.decode_departures(f.read())
+        except payloads.DecodeError as e:
+            print(f"Error reading {file_path}: {e}")
+        return
+
+    seen_windows = set()
+    with open(file_path, "rb") as f:
+        for line in f:
+            try:
+                record = payloads.decode_departure_window(line)
+            except payloads.DecodeError:
+                print(f"Skipping truncated line in {file_path}")
+                continue
+            window = payloads.value(record, "window")
+            if window in seen_windows:
+                continue
+            seen_windows.add(window)
+            yield from payloads.items(record, "departures")
+
+
+def airport_files(folder_path):
+    """
+    Find the departure file of every airport in a folder.
+
+    Args:
+        folder_path (str or Path): The folder containing the airport files.
+
+    Returns:
+        dict: Maps each ICAO code to its file, sorted by ICAO code. A .jsonl file takes
+              precedence over a legacy .json file of the same airport.
+    """
+    files = {}
+    for file_path in sorted(Path(folder_path).iterdir()):
+        code, _, extension = file_path.name.partition(".")
+        if extension == "jsonl" or (extension == "json" and code not in files):
+            files[code] = file_path
+    return dict(sorted(files.items()))
+
+
+def iter_flights(folder_path, airport_codes=None):
+    """
+    Yield the departures of all airports in a folder, tagged with their origin airport.
+
+    Args:
+        folder_path (str or Path): The folder containing the airport files.
+        airport_codes (list, optional): Only read these airports. Defaults to all airports
+                                        found in the folder.
+
+    Yields:
+        payloads.Departure: Departures with their origin set to the airport's ICAO code.
+    """
+    files = airport_files(folder_path)
+    if airport_codes is not None:
+        files = {code: files[code] for code in airport_codes if code in files}
+
+    for origin, file_path in files.items():
+        yield from iter_airport_flights(origin, file_path)
+
+
+def iter_airport_flights(origin, file_path):
+    """
+    Yield the departures of one airport file, tagged with their origin airport.
+
+    Args:
+        origin (str): ICAO code of the airport.
+        file_path (Path): The airport's {ICAO_CODE}.jsonl or legacy .json file.
+
+    Yields:
+        payloads.Departure: Departures with their origin set to the airport's ICAO code.
+    """
+    for flight in iter_departures(file_path):
+        payloads.set_value(flight, "origin", origin)  # Add origin airport code to each flight
+        yield flight
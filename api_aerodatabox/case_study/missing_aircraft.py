@@ -1,5 +1,14 @@
-import json
 import os
+import sys
+from pathlib import Path
+
+# Ensure the api_aerodatabox module path is added
+current_directory = Path(__file__).resolve().parent
+sys.path.insert(0, str(current_directory.parents[0]))
+
+from payloads import value
+from departures_io import airport_files, iter_airport_flights
+from parallel_loader import map_airports
 
 # Load aircraft seat capacity data
 aircraft_seat_capacity = {
@@ -271,42 +280,35 @@ aircraft_seat_capacity = {
 
 # Load JSON data from files
 folder_path = "airport_data"
-file_names = ["DNMM.json", "DNAA.json", "KLAX.json", "KSFO.json", "YSSY.json", "YMML.json"]
+airport_codes = ["DNMM", "DNAA", "KLAX", "KSFO", "YSSY", "YMML"]
 
-flights = []
-missing_models = set()
+# Number of worker processes parsing the airport files, None uses every CPU
+workers = None
 
-for file_name in file_names:
-    file_path = os.path.join(folder_path, file_name)
-    try:
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-            for flight in data:
-                if isinstance(flight, dict):
-                    flight['origin'] = file_name.split('.')[0]  # Add origin airport code to each flight
-                    flights.append(flight)
-                else:
-                    print(f"Skipping malformed entry in {file_name}: {flight}")
-    except json.JSONDecodeError as e:
-        print(f"Error reading {file_path}: {e}")
 
-# Check for missing aircraft models
-for flight in flights:
-    try:
-        aircraft = flight.get("aircraft", {})
-        if isinstance(aircraft, dict):
-            model = aircraft.get("model")
-            if model and model not in aircraft_seat_capacity:
-                missing_models.add(model)
+def airport_missing_models(origin, file_path, seat_capacity):
+    """Return the aircraft models flown from one airport file that are not in seat_capacity."""
+    missing_models = set()
+    for flight in iter_airport_flights(origin, file_path):
+        aircraft = value(flight, "aircraft")
+        if isinstance(aircraft, str):
+            print(f"Aircraft data is not a dictionary for flight from {origin}: {aircraft}")
         else:
-            print(f"Aircraft data is not a dictionary for flight from {flight['origin']}: {aircraft}")
-    except KeyError as e:
-        print(f"Missing key in flight data: {e}")
+            model = value(aircraft, "model")
+            if model and model not in seat_capacity:
+                missing_models.add(model)
+    return missing_models
+
+
+if __name__ == "__main__":
+    # Check for missing aircraft models, parsing the airport files in parallel
+    files = {code: file_path for code, file_path in airport_files(folder_path).items() if code in airport_codes}
+    missing_models = set().union(*map_airports(airport_missing_models, files, aircraft_seat_capacity, workers=workers))
 
-# Log missing aircraft models
-if missing_models:
-    with open(os.path.join(folder_path, "missing_aircraft_models.log"), 'w') as log_file:
-        for model in missing_models:
-            log_file.write(f"Missing aircraft model: {model}\n")
+    # Log missing aircraft models
+    if missing_models:
+        with open(os.path.join(folder_path, "missing_aircraft_models.log"), 'w') as log_file:
+            for model in sorted(missing_models):
+                log_file.write(f"Missing aircraft model: {model}\n")
 
-print("Processing complete. Missing aircraft models have been logged.")
+    print("Processing complete. Missing aircraft models have been logged.")
@@ -0,0 +1,90 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+
+from airport_index import AirportIndex
+from departures_io import iter_airport_flights
+from seat_matrix_builder import aggregates_to_matrices, flights_frame, merge_seat_aggregates, seat_aggregates
+
+
+#######################################
+# Parallel per-airport parsing ########
+#######################################
+
+"""
+    Every airport file is parsed by its own task on a process pool. Workers
+    return small partial results (e.g. summed seats per matrix cell), which
+    are reduced in the order of the airport files, so the output does not
+    depend on the number of workers or on which task finishes first.
+
+    Scripts using the pool must run their code under
+    if __name__ == "__main__": as the workers re-import the main module on
+    platforms that spawn processes (Windows, macOS).
+"""
+
+
+def map_airports(function, files, *args, workers=None):
+    """
+    Call function(origin, file_path, *args) for every airport file on a process pool.
+
+    Args:
+        function (callable): A module-level function, so it can be sent to the workers.
+        files (dict): Maps ICAO codes to airport files, as returned by departures_io.airport_files.
+        *args: Further arguments passed to every call.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs;
+                                 1 runs everything in the current process.
+
+    Returns:
+        list: The results in the order of files.
+    """
+    origins, file_paths = list(files), list(files.values())
+    if workers == 1:
+        return [function(origin, file_path, *args) for origin, file_path in zip(origins, file_paths)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(function, origins, file_paths, *(repeat(arg) for arg in args)))
+
+
+@lru_cache(maxsize=1)
+def _airport_index(airport_codes):
+    # Built once per worker process rather than once per airport
+    return AirportIndex(airport_codes)
+
+
+def _airport_seat_aggregates(origin, file_path, airport_codes, kinds, start_date, end_date, seat_capacity):
+    flights_df = flights_frame(iter_airport_flights(origin, file_path))
+    return seat_aggregates(flights_df, _airport_index(airport_codes), kinds, start_date, end_date, seat_capacity)
+
+
+def load_seat_matrices(files, airport_index, kinds, start_date, end_date, seat_capacity, workers=None):
+    """
+    Build seat matrices from airport files, parsing the airports in parallel.
+
+    Each worker parses one airport and sums its seats and flights per matrix cell; the
+    partial sums of all airports are then merged and averaged. The result is identical
+    to seat_matrix_builder.build_seat_matrices on the flights of all files.
+
+    Args:
+        files (dict): Maps ICAO codes to airport files; only airports in airport_index are read.
+        airport_index (AirportIndex): Registry of the matrix rows and columns.
+        kinds (list): Period kinds to build, "weekly" and/or "monthly".
+        start_date (datetime): Start of the first period.
+        end_date (datetime): End of the range.
+        seat_capacity (dict): Maps aircraft model names to seat counts.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        tuple:
+            - list: For every kind, a dict mapping period labels to scipy.sparse.csr_matrix.
+            - set: Aircraft models of the counted flights without a known seat capacity.
+    """
+    files = {code: file_path for code, file_path in files.items() if code in airport_index}
+    partials = map_airports(_airport_seat_aggregates, files, tuple(airport_index.codes), kinds,
+                            start_date, end_date, seat_capacity, workers=workers)
+
+    aggregates = [merge_seat_aggregates(partial[k] for partial in partials) for k in range(len(kinds))]
+    return aggregates_to_matrices(aggregates, airport_index, kinds, start_date, end_date)
@@ -0,0 +1,258 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+from functools import lru_cache
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+import scipy.sparse
+
+from payloads import value
+
+
+#######################################
+# Flight table ########################
+#######################################
+
+
+def flights_frame(flights):
+    """
+    Flatten departure records into one flight table, parsing every timestamp once.
+
+    Args:
+        flights (iterable): payloads.Departure records with their origin set, as yielded
+                            by departures_io.iter_flights.
+
+    Returns:
+        pd.DataFrame: Columns origin, destination, scheduled_utc (naive UTC datetime,
+                      NaT if unparseable) and aircraft_model (None if missing).
+    """
+    origins, destinations, times, models = [], [], [], []
+    for flight in flights:
+        movement = value(flight, "movement")
+        origins.append(value(flight, "origin"))
+        destinations.append(value(value(movement, "airport"), "icao"))
+        times.append(value(value(movement, "scheduledTime"), "utc"))
+        models.append(value(value(flight, "aircraft"), "model"))
+
+    return pd.DataFrame({
+        'origin': origins,
+        'destination': destinations,
+        'scheduled_utc': pd.to_datetime(pd.Series(times, dtype=object), format="%Y-%m-%d %H:%MZ", errors='coerce'),
+        'aircraft_model': models,
+    })
+
+
+#######################################
+# Seat matrices #######################
+#######################################
+
+
+def number_of_weeks(start_date, end_date):
+    """Return the number of 7-day periods starting at start_date that begin before end_date."""
+    return int(np.ceil((end_date - start_date) / pd.Timedelta(days=7)))
+
+
+def _naive_utc(scheduled_utc):
+    """Return departure times as a numpy datetime64 array in naive UTC (NaT if unparsed)."""
+    if isinstance(scheduled_utc, np.ndarray):
+        return scheduled_utc
+    scheduled_utc = pd.Series(scheduled_utc)
+    if getattr(scheduled_utc.dt, 'tz', None) is not None:
+        scheduled_utc = scheduled_utc.dt.tz_convert(None)
+    return scheduled_utc.to_numpy(dtype='datetime64[ns]')
+
+
+def weekly_periods(scheduled_utc, start_date):
+    """Return the number of the 7-day period starting at start_date of every departure time (NaN if unparsed)."""
+    return np.floor((_naive_utc(scheduled_utc) - np.datetime64(start_date)) / np.timedelta64(7, 'D'))
+
+
+def weekly_labels(start_date, end_date):
+    """Return the starts "%Y-%m-%d" of all weeks beginning at start_date and before end_date."""
+    return [(start_date + pd.Timedelta(days=7 * w)).strftime("%Y-%m-%d")
+            for w in range(number_of_weeks(start_date, end_date))]
+
+
+def monthly_periods(scheduled_utc, start_date, end_date):
+    """Return the calendar month number, counted from the month of start_date, of every departure time in the range."""
+    scheduled_utc = _naive_utc(scheduled_utc)
+    period = (scheduled_utc.astype('datetime64[M]') - np.datetime64(start_date, 'M')).astype(float)
+    in_range = (scheduled_utc >= np.datetime64(start_date)) & (scheduled_utc < np.datetime64(end_date))
+    period[~in_range] = np.nan
+    return period
+
+
+def monthly_labels(start_date, end_date):
+    """Return the months "%Y-%m" overlapping the range from start_date to end_date."""
+    last_month = pd.Timestamp(end_date) - pd.Timedelta(seconds=1)
+    return [str(month) for month in pd.period_range(pd.Period(start_date, freq='M'), last_month, freq='M')]
+
+
+def periods(kind, scheduled_utc, start_date, end_date):
+    """
+    Assign departure times to weekly or monthly periods.
+
+    Args:
+        kind (str): "weekly" or "monthly".
+        scheduled_utc (pd.Series or np.ndarray): Departure times.
+        start_date (datetime): Start of the first period.
+        end_date (datetime): End of the range.
+
+    Returns:
+        tuple: (period number of every flight, period labels).
+    """
+    if kind == "weekly":
+        period = weekly_periods(scheduled_utc, start_date)
+    else:
+        period = monthly_periods(scheduled_utc, start_date, end_date)
+    return period, period_labels(kind, start_date, end_date)
+
+
+@lru_cache(maxsize=None)
+def period_labels(kind, start_date, end_date):
+    """Return the labels of the weekly or monthly periods of the range, see periods."""
+    if kind == "weekly":
+        return tuple(weekly_labels(start_date, end_date))
+    return tuple(monthly_labels(start_date, end_date))
+
+
+class SeatAggregate(NamedTuple):
+    """
+    Seats and flights summed per (period, origin, destination) cell.
+
+    The cell key is (period * n + row) * n + col for n airports; keys are sorted and unique.
+    """
+    keys: np.ndarray
+    seat_sums: np.ndarray
+    flight_counts: np.ndarray
+    missing_models: set
+
+
+def seat_aggregates(flights_df, airport_index, kinds, start_date, end_date, seat_capacity):
+    """
+    Sum seats and flights per (period, origin, destination) with a single group-by over integer keys.
+
+    Airports and aircraft models are looked up once for all period kinds. Each flight is
+    counted for both directions of its airport pair.
+
+    Args:
+        flights_df (pd.DataFrame): Flight table as returned by flights_frame or
+                                   movement_store.read_movements.
+        airport_index (AirportIndex): Registry of the matrix rows and columns; flights
+                                      between other airports are ignored.
+        kinds (list): Period kinds to sum, "weekly" and/or "monthly", see periods.
+        start_date (datetime): Start of the first period.
+        end_date (datetime): End of the range.
+        seat_capacity (dict): Maps aircraft model names to seat counts.
+
+    Returns:
+        list: A SeatAggregate for every kind, holding the sums and the aircraft models of
+              the counted flights without a known seat capacity.
+    """
+    n = len(airport_index)
+    origin = airport_index.get_indexer(flights_df['origin'])
+    destination = airport_index.get_indexer(flights_df['destination'])
+    models = flights_df['aircraft_model'].to_numpy(dtype=object)
+    scheduled_utc = _naive_utc(flights_df['scheduled_utc'])
+
+    known = (origin >= 0) & (destination >= 0) & pd.notna(models)
+    origin, destination, models = origin[known], destination[known], models[known]
+    seats = np.fromiter((seat_capacity.get(model, 0) for model in models), dtype=np.int64, count=len(models))
+    unknown = seats == 0
+    scheduled_utc = scheduled_utc[known]
+
+    aggregates = []
+    for kind in kinds:
+        period, labels = periods(kind, scheduled_utc, start_date, end_date)
+        valid = (period >= 0) & (period < len(labels))
+
+        # Count every flight for both directions of its airport pair
+        period = np.tile(period[valid].astype(np.int64), 2)
+        row = np.concatenate([origin[valid], destination[valid]]).astype(np.int64)
+        col = np.concatenate([destination[valid], origin[valid]]).astype(np.int64)
+        key = (period * n + row) * n + col
+        aggregates.append(_sum_by_key(key, np.tile(seats[valid], 2), np.ones(len(key), dtype=np.int64),
+                                      set(models[valid & unknown])))
+    return aggregates
+
+
+def _sum_by_key(keys, seats, flights, missing_models):
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    return SeatAggregate(unique_keys,
+                         np.bincount(inverse, weights=seats, minlength=len(unique_keys)).astype(np.int64),
+                         np.bincount(inverse, weights=flights, minlength=len(unique_keys)).astype(np.int64),
+                         missing_models)
+
+
+def merge_seat_aggregates(aggregates):
+    """Reduce partial SeatAggregates of the same airport index and periods, e.g. of single airports, into one."""
+    aggregates = list(aggregates)
+    return _sum_by_key(np.concatenate([a.keys for a in aggregates] + [np.empty(0, dtype=np.int64)]),
+                       np.concatenate([a.seat_sums for a in aggregates] + [np.empty(0, dtype=np.int64)]),
+                       np.concatenate([a.flight_counts for a in aggregates] + [np.empty(0, dtype=np.int64)]),
+                       set().union(*(a.missing_models for a in aggregates)))
+
+
+def seat_matrices(aggregate, n, labels):
+    """
+    Turn a SeatAggregate into sparse matrices of the average seats per flight.
+
+    The average is the integer division of seats by flights.
+
+    Args:
+        aggregate (SeatAggregate): The summed seats and flights.
+        n (int): Number of airports of the index the aggregate was built with.
+        labels (list): Name of every period.
+
+    Returns:
+        dict: Maps the period labels to scipy.sparse.csr_matrix of shape (n, n).
+    """
+    average_seats = aggregate.seat_sums // aggregate.flight_counts
+    key_period, key_cell = np.divmod(aggregate.keys, n * n)
+    key_row, key_col = np.divmod(key_cell, n)
+
+    # Keys are sorted by period, so every period is a contiguous slice
+    bounds = np.searchsorted(key_period, np.arange(len(labels) + 1))
+    matrices = {}
+    for p, label in enumerate(labels):
+        cells = slice(bounds[p], bounds[p + 1])
+        matrix = scipy.sparse.csr_matrix((average_seats[cells], (key_row[cells], key_col[cells])),
+                                         shape=(n, n), dtype=np.int64)
+        matrix.eliminate_zeros()
+        matrices[label] = matrix
+    return matrices
+
+
+def build_seat_matrices(flights_df, airport_index, kinds, start_date, end_date, seat_capacity):
+    """
+    Build sparse matrices of the average seats per flight between all airport pairs for every period in one pass.
+
+    Args:
+        flights_df (pd.DataFrame): Flight table as returned by flights_frame or
+                                   movement_store.read_movements.
+        airport_index (AirportIndex): Registry of the matrix rows and columns; flights
+                                      between other airports are ignored.
+        kinds (list): Period kinds to build: "weekly" for the 7-day periods starting at
+                      start_date and beginning before end_date, "monthly" for the calendar
+                      months of the departures from start_date until before end_date.
+        start_date (datetime): Start of the first period.
+        end_date (datetime): End of the range.
+        seat_capacity (dict): Maps aircraft model names to seat counts.
+
+    Returns:
+        tuple:
+            - list: For every kind, a dict mapping the period labels to scipy.sparse.csr_matrix
+                    of average seats per flight, rows and columns in airport_index order.
+            - set: Aircraft models of the counted flights without a known seat capacity.
+    """
+    aggregates = seat_aggregates(flights_df, airport_index, kinds, start_date, end_date, seat_capacity)
+    return aggregates_to_matrices(aggregates, airport_index, kinds, start_date, end_date)
+
+
+def aggregates_to_matrices(aggregates, airport_index, kinds, start_date, end_date):
+    """Turn the SeatAggregates of every kind into seat matrices, see build_seat_matrices."""
+    matrices = [seat_matrices(aggregate, len(airport_index), period_labels(kind, start_date, end_date))
+                for aggregate, kind in zip(aggregates, kinds)]
+    return matrices, set().union(*(aggregate.missing_models for aggregate in aggregates))
@@ -1,106 +1,61 @@
-import json
-from datetime import datetime, timedelta
-import pandas as pd
-from collections import defaultdict
+from datetime import datetime
 import os
+import sys
+from pathlib import Path
+
+# Ensure the api_aerodatabox module path is added
+current_directory = Path(__file__).resolve().parent
+sys.path.insert(0, str(current_directory.parents[0]))
+
+import movement_store
+from airport_index import AirportIndex, save_labeled_matrix
 from aircraft_seat_list import aircraft_seat_capacity  # Import the aircraft seat capacity list
+from seat_matrix_builder import build_seat_matrices
+from departures_io import airport_files
+from parallel_loader import load_seat_matrices
 
 # Load JSON data from files
 folder_path = "airport_data"
 
-flights = []
-
-# Get all JSON files in the folder and derive airport codes
-file_names = [f for f in os.listdir(folder_path) if f.endswith('.json')]
-airport_codes = [f.split('.')[0] for f in file_names]
-
-for file_name in file_names:
-    file_path = os.path.join(folder_path, file_name)
-    try:
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-            for flight in data:
-                if isinstance(flight, dict):
-                    flight['origin'] = file_name.split('.')[0]  # Add origin airport code to each flight
-                    flights.append(flight)
-                else:
-                    print(f"Skipping malformed entry in {file_name}: {flight}")
-    except json.JSONDecodeError as e:
-        print(f"Error reading {file_path}: {e}")
-
 # Define start and end dates
 start_date = datetime(2024, 4, 1)
 end_date = datetime(2024, 4, 6)
-current_date = start_date
-
-# Prepare a structure to hold seat matrices for each week
-seat_matrices = {}
-flight_counts = {}
-missing_models = set()
-
-# Iterate through each week
-while current_date < end_date:
-    week_end_date = current_date + timedelta(days=7)
-    weekly_seat_matrix = defaultdict(lambda: defaultdict(int))
-    weekly_flight_count = defaultdict(lambda: defaultdict(int))
-
-    # Filter flights for the current week
-    for flight in flights:
-        try:
-            movement_time = datetime.strptime(flight["movement"]["scheduledTime"]["utc"], "%Y-%m-%d %H:%MZ")
-            if current_date <= movement_time < week_end_date:
-                origin = flight["origin"]
-                destination = flight["movement"]["airport"].get("icao")  # Use .get to avoid KeyError
-                if destination and destination in airport_codes and origin in airport_codes:
-                    aircraft = flight.get("aircraft", {})
-                    if isinstance(aircraft, dict):
-                        model = aircraft.get("model")
-                        if model:
-                            seats = aircraft_seat_capacity.get(model, 0)
-                            if seats == 0:
-                                missing_models.add(model)
-                            # Accumulate seats for both directions in the same field
-                            weekly_seat_matrix[origin][destination] += seats
-                            weekly_seat_matrix[destination][origin] += seats
-                            # Increment flight count for both directions
-                            weekly_flight_count[origin][destination] += 1
-                            weekly_flight_count[destination][origin] += 1
-                        else:
-                            print(f"Missing model for flight from {origin} to {destination}")
-                    else:
-                        print(f"Aircraft data is not a dictionary for flight from {origin} to {destination}: {aircraft}")
-        except KeyError as e:
-            print(f"Missing key in flight data: {e}")
-        except ValueError as e:
-            print(f"Error parsing date for flight: {e}")
-
-    # Save the weekly matrices
-    seat_matrices[current_date.strftime("%Y-%m-%d")] = weekly_seat_matrix
-    flight_counts[current_date.strftime("%Y-%m-%d")] = weekly_flight_count
-
-    # Move to the next week
-    current_date = week_end_date
-
-# Calculate average seats per flight and save to CSV
-for week in seat_matrices:
-    seat_matrix = seat_matrices[week]
-    flight_count = flight_counts[week]
-    average_seat_matrix = defaultdict(lambda: defaultdict(int))
-
-    for origin in seat_matrix:
-        for destination in seat_matrix[origin]:
-            if flight_count[origin][destination] > 0:
-                average_seat_matrix[origin][destination] = seat_matrix[origin][destination] // flight_count[origin][destination]
-
-    df = pd.DataFrame(average_seat_matrix).fillna(0).astype(int)
-    df = df.reindex(index=airport_codes, columns=airport_codes, fill_value=0)
-    df.to_csv(os.path.join(folder_path, f"seat_matrix_{week}.csv"))
-
-# Log missing aircraft models
-if missing_models:
-    with open(os.path.join(folder_path, "missing_aircraft_models.log"), 'w') as log_file:
-        for model in missing_models:
-            log_file.write(f"Missing aircraft model: {model}\n")
 
-print("Processing complete. Seat matrices have been saved to CSV files in the same folder as the JSON files.")
-print("Missing aircraft models have been logged.")
+# Number of worker processes parsing the airport files, None uses every CPU
+workers = None
+
+if __name__ == "__main__":
+    # Get all airport files in the folder and derive airport codes
+    files = airport_files(folder_path)
+    airport_codes = list(files)
+
+    # Keep the matrix rows and columns stable across runs: airports added later are appended to the registry
+    airport_index = AirportIndex.load_or_create(os.path.join(folder_path, "airport_index.npz"), airport_codes)
+
+    # Build the seat matrices of all weeks and months, preferring the columnar movement store if it has been built
+    if movement_store.movements_store_directory.exists():
+        # Convert the airports whose departure files are new or changed since the last conversion
+        stale_origins = movement_store.stale_airport_origins(folder_path)
+        if stale_origins:
+            movement_store.convert_airport_data(folder_path, origins=stale_origins)
+        flights_df = movement_store.read_movements(columns=['origin', 'destination', 'scheduled_utc', 'aircraft_model'],
+                                                   origins=airport_codes)
+        (weekly_matrices, monthly_matrices), missing_models = build_seat_matrices(
+            flights_df, airport_index, ["weekly", "monthly"], start_date, end_date, aircraft_seat_capacity)
+    else:
+        # Parse the airport files in parallel, one airport per task
+        (weekly_matrices, monthly_matrices), missing_models = load_seat_matrices(
+            files, airport_index, ["weekly", "monthly"], start_date, end_date, aircraft_seat_capacity, workers=workers)
+
+    # Save the average seats per flight of every week and month as sparse matrices with their airport labels
+    for period, matrix in {**weekly_matrices, **monthly_matrices}.items():
+        save_labeled_matrix(os.path.join(folder_path, f"seat_matrix_{period}"), matrix, airport_index.codes)
+
+    # Log missing aircraft models
+    if missing_models:
+        with open(os.path.join(folder_path, "missing_aircraft_models.log"), 'w') as log_file:
+            for model in sorted(missing_models):
+                log_file.write(f"Missing aircraft model: {model}\n")
+
+    print("Processing complete. Seat matrices have been saved to .npz files in the same folder as the JSON files.")
+    print("Missing aircraft models have been logged.")
@@ -0,0 +1,89 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+#######################################
+# Paths ###############################
+#######################################
+
+current_directory = Path(__file__).resolve().parent
+default_manifest_path = current_directory / "crawl_manifest.jsonl"
+
+
+#######################################
+# Crawl manifest ######################
+#######################################
+
+
+class CrawlManifest:
+    """
+    Persistent journal of API crawl units, so interrupted crawls can be resumed.
+
+    Every unit of work is keyed by (endpoint, airport, window) and its outcome is
+    appended as one JSON line to the manifest file. When a manifest is reopened the
+    journal is replayed and the last recorded status of each unit wins, so reruns
+    skip completed units and only retry failed or never attempted ones.
+
+    Example JSON Lines Structure:
+
+        crawl_manifest.jsonl:
+        {"endpoint": "stats/routes/daily", "airport": "LSZH", "window": "2023-05-07", "status": "done", "status_code": 200, "time": "..."}
+        {"endpoint": "flights/airports", "airport": "KLAX", "window": "2023-05-25T00:00/2023-05-25T12:00", "status": "failed", "status_code": 429, "time": "..."}
+
+    Args:
+        path (Path, optional): Location of the manifest file. Defaults to
+                               crawl_manifest.jsonl next to this module.
+    """
+
+    def __init__(self, path=default_manifest_path):
+        self.path = Path(path)
+        self.status = {}
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Skip a line truncated by a crash
+                    self.status[(record['endpoint'], record['airport'], record['window'])] = record['status']
+
+    def is_done(self, endpoint, airport, window=None):
+        return self.status.get((endpoint, airport, window)) == "done"
+
+    def failed(self):
+        """Return the keys of all units whose last attempt failed."""
+        return [key for key, status in self.status.items() if status == "failed"]
+
+    def mark(self, endpoint, airport, window, status, status_code=None):
+        """
+        Record the outcome of a crawl unit and flush it to disk immediately.
+
+        Args:
+            endpoint (str): API endpoint of the unit, e.g. "stats/routes/daily".
+            airport (str): ICAO code of the airport.
+            window (str): Date or time window of the request, None if not applicable.
+            status (str): "done" or "failed".
+            status_code (int, optional): HTTP status code of the response.
+        """
+        self.status[(endpoint, airport, window)] = status
+        record = {
+            'endpoint': endpoint,
+            'airport': airport,
+            'window': window,
+            'status': status,
+            'status_code': status_code,
+            'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+
+    def mark_done(self, endpoint, airport, window=None, status_code=200):
+        self.mark(endpoint, airport, window, "done", status_code)
+
+    def mark_failed(self, endpoint, airport, window=None, status_code=None):
+        self.mark(endpoint, airport, window, "failed", status_code)
@@ -3,11 +3,15 @@
 #######################################
 
 import json
+import numpy as np
 import pandas as pd
 import geopandas as gpd
-from shapely.geometry import LineString
+import shapely
 from pathlib import Path
 
+import payloads
+from payloads import items, value
+
 
 #######################################
 # Function to prepare airport data
@@ -63,9 +67,9 @@ def prepare_airport_data():
     # Read airports data
     file_path = current_directory / "airport_data/available_airports.json"
     try:
-        with open(file_path, 'r') as f:
-            airports_icao = json.load(f)
-    except json.decoder.JSONDecodeError as e:
+        with open(file_path, 'rb') as f:
+            airports_icao = payloads.loads(f.read())
+    except payloads.DecodeError as e:
         print(f"Error: Invalid JSON format in {file_path}: {e}")
         return None
 
@@ -78,16 +82,16 @@ def prepare_airport_data():
     for icao_airport in airport_list_df['icao']:
         file_path = current_directory / f"airport_data/airports_detail_data/{icao_airport}.json"
         if file_path.exists():
-            with open(file_path, 'r', encoding='utf-8') as f:
-                airport_info = json.load(f)
+            with open(file_path, 'rb') as f:
+                airport_info = payloads.decode_airport_detail(f.read())
             airport = {
                 'icao': icao_airport,
-                'airport_name': airport_info['fullName'],
-                'lat': airport_info['location']['lat'],
-                'lon': airport_info['location']['lon'],
-                'country': airport_info['country']['name'],
-                'country_code': airport_info['country']['code'],
-                'continent': airport_info['continent']['name'],
+                'airport_name': value(airport_info, 'fullName'),
+                'lat': value(value(airport_info, 'location'), 'lat'),
+                'lon': value(value(airport_info, 'location'), 'lon'),
+                'country': value(value(airport_info, 'country'), 'name'),
+                'country_code': value(value(airport_info, 'country'), 'code'),
+                'continent': value(value(airport_info, 'continent'), 'name'),
             }
             airport_info_list.append(airport)
         else:
@@ -174,64 +178,67 @@ def prepare_airport_data():
 def generate_flight_connections_json(month, departure_airports_geodf, x=100):
     current_directory = Path(__file__).resolve().parent
 
-    # Initialize a list to hold all data frames
-    all_connections = []
+    # Index the departure airports by ICAO code once (the first entry of a code is used)
+    departure_airports = departure_airports_geodf.drop_duplicates('icao').set_index('icao')
 
-    # Iterate over the different departure locations
+    # Collect the valid routes of all departure airports as plain tuples
+    routes = []
+    routes_per_airport = []
     for icao_departure in departure_airports_geodf['icao'][:x]:
         file_path = current_directory / f"connection_data/{month}/{icao_departure}.json"
         try:
-            with open(file_path, 'r') as f:
-                airport_connections = json.load(f)
+            with open(file_path, 'rb') as f:
+                airport_connections = payloads.decode_routes_daily(f.read())
         except FileNotFoundError:
             print(f"Warning: JSON file for {icao_departure} during {month} not found. Skipping this airport.")
             continue
 
-        connections = []
-        for route in airport_connections['routes']:
-            icao = route['destination'].get('icao')
-            if icao is not None:
-                destination_info = route['destination'].get('location')
-                if destination_info is not None:
-                    lat = destination_info.get('lat')
-                    lon = destination_info.get('lon')
-                    if lat is not None and lon is not None:
-                        departure_point = (
-                            departure_airports_geodf.loc[departure_airports_geodf['icao'] == icao_departure, 'lon'].iloc[0],
-                            departure_airports_geodf.loc[departure_airports_geodf['icao'] == icao_departure, 'lat'].iloc[0]
-                        )
-                        destination_point = (lon, lat)
-                        line_geometry = LineString([departure_point, destination_point])
-                        line_wkt = line_geometry.wkt
-                        route_info = {
-                            'icao_departure': icao_departure,
-                            'departure_airport_name': departure_airports_geodf.loc[
-                                departure_airports_geodf['icao'] == icao_departure, 'airport_name'].iloc[0],
-                            'departure_country': departure_airports_geodf.loc[
-                                departure_airports_geodf['icao'] == icao_departure, 'country'].iloc[0],
-                            'departure_continent': departure_airports_geodf.loc[
-                                departure_airports_geodf['icao'] == icao_departure, 'continent'].iloc[0],
-                            'icao_destination': icao,
-                            'destination_airport_name': route['destination']['name'],
-                            'destination_country_code': route['destination']['countryCode'],
-                            'lat_departure': departure_airports_geodf.loc[
-                                departure_airports_geodf['icao'] == icao_departure, 'lat'].iloc[0],
-                            'lon_departure': departure_airports_geodf.loc[
-                                departure_airports_geodf['icao'] == icao_departure, 'lon'].iloc[0],
-                            'lat_destination': lat,
-                            'lon_destination': lon,
-                            'averageDailyFlights': route['averageDailyFlights'],
-                            'line_geometry': line_wkt
-                        }
-                        connections.append(route_info)
-
-        # Create DataFrame containing all connections
-        airport_connections_df = pd.DataFrame(connections)
-
-        # Convert DataFrame to dictionary and append it to the connections
-        all_connections.append(airport_connections_df.to_dict(orient='records'))
+        number_of_routes = len(routes)
+        for route in items(airport_connections, 'routes'):
+            destination = value(route, 'destination')
+            location = value(destination, 'location')
+            icao, lat, lon = value(destination, 'icao'), value(location, 'lat'), value(location, 'lon')
+            if icao is not None and lat is not None and lon is not None:
+                routes.append((icao_departure, icao, value(destination, 'name'), value(destination, 'countryCode'),
+                               lat, lon, value(route, 'averageDailyFlights')))
+        routes_per_airport.append(len(routes) - number_of_routes)
+
+    routes_df = pd.DataFrame(routes, columns=['icao_departure', 'icao_destination', 'destination_airport_name',
+                                              'destination_country_code', 'lat_destination', 'lon_destination',
+                                              'averageDailyFlights'])
+
+    # Look up the departure airport of every route in the index
+    departures = departure_airports.reindex(routes_df['icao_departure'])
+    connections_df = pd.DataFrame({
+        'icao_departure': routes_df['icao_departure'],
+        'departure_airport_name': departures['airport_name'].to_numpy(),
+        'departure_country': departures['country'].to_numpy(),
+        'departure_continent': departures['continent'].to_numpy(),
+        'icao_destination': routes_df['icao_destination'],
+        'destination_airport_name': routes_df['destination_airport_name'],
+        'destination_country_code': routes_df['destination_country_code'],
+        'lat_departure': departures['lat'].to_numpy(),
+        'lon_departure': departures['lon'].to_numpy(),
+        'lat_destination': routes_df['lat_destination'],
+        'lon_destination': routes_df['lon_destination'],
+        'averageDailyFlights': routes_df['averageDailyFlights'],
+    })
+
+    # Build the line geometries of all routes at once and serialise them to WKT
+    coordinates = np.stack([
+        connections_df[['lon_departure', 'lat_departure']].to_numpy(dtype=float),
+        connections_df[['lon_destination', 'lat_destination']].to_numpy(dtype=float),
+    ], axis=1)
+    connections_df['line_geometry'] = shapely.to_wkt(shapely.linestrings(coordinates), rounding_precision=-1)
+
+    # Split the connections into one list per departure airport
+    records = connections_df.to_dict(orient='records')
+    all_connections = []
+    first = 0
+    for number_of_routes in routes_per_airport:
+        all_connections.append(records[first:first + number_of_routes])
+        first += number_of_routes
 
-    # Save data frames as individual JSON files
     # Save all connections as a single JSON file
     output_json_path = current_directory / f"connection_data/flight_connections_{month}.json"
     with open(output_json_path, 'w') as f:
@@ -2,10 +2,12 @@
 # IMPORTS #############################
 #######################################
 
-import json
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+import payloads
+
 #######################################
 # create 2 panda Data frames ##########
 #######################################
@@ -78,73 +80,37 @@ def process_flight_connections(month):
 
     # Data import
     file_path = current_directory / f"connection_data/flight_connections_{month}.json"
-    with open(file_path, 'r') as f:
-        connection_data = json.load(f)
-
-    # Initialize lists for daily flights per departure airport
-    departure_icao_list = []
-    number_of_total_flights_list = []
-    lat_departure_list = []
-    lon_departure_list = []
-    departure_name_list = []
-    departure_country_list = []
-    departure_continent_list = []
-
-    for connection_list in connection_data:
-        flights_by_departure = {}
-
-        for connection in connection_list:
-            departure_icao = connection["icao_departure"]
-            daily_flights = connection["averageDailyFlights"]
-            departure_name = connection["departure_airport_name"]
-
-            # Accumulate daily flights per departure airport
-            if departure_icao in flights_by_departure:
-                flights_by_departure[departure_icao] += daily_flights
-            else:
-                flights_by_departure[departure_icao] = daily_flights
-
-        # Append data to lists
-        for departure_icao, total_flights in flights_by_departure.items():
-            departure_icao_list.append(departure_icao)
-            number_of_total_flights_list.append(total_flights)
-            # Find the corresponding coordinates and name for the departure airport
-            for connection in connection_list:
-                if connection["icao_departure"] == departure_icao:
-                    departure_name_list.append(connection["departure_airport_name"])
-                    lat_departure_list.append(connection["lat_departure"])
-                    lon_departure_list.append(connection["lon_departure"])
-                    departure_country_list.append(connection["departure_country"])
-                    departure_continent_list.append(connection["departure_continent"])
-                    break
+    with open(file_path, 'rb') as f:
+        connection_data = payloads.loads(f.read())
+
+    # Create DataFrame with the connection data in a single construction
+    list_sizes = [len(connection_list) for connection_list in connection_data]
+    flight_data_df = pd.DataFrame(
+        [connection for connection_list in connection_data for connection in connection_list],
+        columns=['lat_departure', 'lon_departure', 'lat_destination', 'lon_destination', 'icao_departure',
+                 'departure_airport_name', 'departure_country', 'departure_continent', 'icao_destination',
+                 'destination_airport_name', 'averageDailyFlights'])
+    del connection_data
+
+    # Sum the daily flights per departure airport within each connection list of the file, taking the
+    # name, country, continent and coordinates from the first connection of the airport
+    list_position = np.repeat(np.arange(len(list_sizes)), list_sizes)
+    groups = flight_data_df.groupby([list_position, flight_data_df['icao_departure']], sort=False, dropna=False)
+    first_connections = flight_data_df[groups.cumcount().to_numpy() == 0]
+    # bincount adds the flights in file order, like a running sum per airport
+    daily_flights = flight_data_df['averageDailyFlights']
+    total_flights = np.bincount(groups.ngroup().to_numpy(), weights=daily_flights.to_numpy(dtype=float),
+                                minlength=len(first_connections)).astype(daily_flights.dtype)
 
     # Create DataFrame for daily flights
-    flight_data = {
-        'icao_departure': departure_icao_list,
-        'departure_airport_name': departure_name_list,
-        'departure_country': departure_country_list,
-        'departure_continent': departure_continent_list,
-        'number_of_total_flights': number_of_total_flights_list,
-        'lat_departure': lat_departure_list,
-        'lon_departure': lon_departure_list
-    }
-    daily_flights_df = pd.DataFrame(flight_data)
-
-    # Create DataFrame with the connection data
-    data = [{
-        'lat_departure': connection['lat_departure'],
-        'lon_departure': connection['lon_departure'],
-        'lat_destination': connection['lat_destination'],
-        'lon_destination': connection['lon_destination'],
-        'icao_departure': connection['icao_departure'],
-        'departure_airport_name': connection['departure_airport_name'],
-        'departure_country': connection['departure_country'],
-        'departure_continent': connection['departure_continent'],
-        'icao_destination': connection['icao_destination'],
-        'destination_airport_name': connection['destination_airport_name'],
-        'averageDailyFlights': connection['averageDailyFlights']
-    } for connection_list in connection_data for connection in connection_list]
-
-    flight_data_df = pd.DataFrame(data)
+    daily_flights_df = pd.DataFrame({
+        'icao_departure': first_connections['icao_departure'].to_numpy(),
+        'departure_airport_name': first_connections['departure_airport_name'].to_numpy(),
+        'departure_country': first_connections['departure_country'].to_numpy(),
+        'departure_continent': first_connections['departure_continent'].to_numpy(),
+        'number_of_total_flights': total_flights,
+        'lat_departure': first_connections['lat_departure'].to_numpy(),
+        'lon_departure': first_connections['lon_departure'].to_numpy(),
+    })
 
     return flight_data_df, daily_flights_df
@@ -0,0 +1,328 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+import shutil
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+import payloads
+from payloads import items, value
+from case_study.departures_io import airport_files, iter_departures
+
+
+#######################################
+# Paths ###############################
+#######################################
+
+current_directory = Path(__file__).resolve().parent
+airport_data_directory = current_directory / "case_study" / "airport_data"
+connection_data_directory = current_directory / "connection_data"
+movements_store_directory = current_directory / "movement_store" / "movements"
+routes_store_directory = current_directory / "movement_store" / "routes"
+
+
+#######################################
+# Schemas #############################
+#######################################
+
+"""
+    Columnar flight-movement store.
+
+    Departures from case_study/airport_data and route statistics from
+    connection_data/<month>/ are normalised into typed columns and written as
+    Parquet datasets with dictionary-encoded strings:
+
+        movement_store/movements/month=2024-04/origin=KATL/KATL-0.parquet
+        +--------+-------------+-------------------------+----------------+--------------+-----------------+
+        | origin | destination | scheduled_utc           | aircraft_model | registration | airline         |
+        +========+=============+=========================+================+==============+=================+
+        | KATL   | KCLT        | 2024-04-01 05:01:00 UTC | Airbus A321    | N937VQ       | Delta Air Lines |
+        +--------+-------------+-------------------------+----------------+--------------+-----------------+
+
+        movement_store/routes/month=04-April/04-April-0.parquet
+        +--------+-------------+------------------+--------------------------+-----------------+-----------------+----------------------+
+        | origin | destination | destination_name | destination_country_code | lat_destination | lon_destination | average_daily_flights |
+        +========+=============+==================+==========================+=================+=================+======================+
+        | LSZH   | EGLL        | London Heathrow  | GB                       | 51.4706         | -0.461941       | 12.86                |
+        +--------+-------------+------------------+--------------------------+-----------------+-----------------+----------------------+
+
+    Readers select the columns and the month/origin partitions they need, so
+    only those files and column chunks are read from disk.
+"""
+
+dictionary_string = pa.dictionary(pa.int32(), pa.string())
+
+movements_schema = pa.schema([
+    ('destination', dictionary_string),
+    ('scheduled_utc', pa.timestamp('s', tz='UTC')),
+    ('aircraft_model', dictionary_string),
+    ('registration', dictionary_string),
+    ('airline', dictionary_string),
+    ('month', pa.string()),
+    ('origin', pa.string()),
+])
+
+routes_schema = pa.schema([
+    ('origin', dictionary_string),
+    ('destination', dictionary_string),
+    ('destination_name', dictionary_string),
+    ('destination_country_code', dictionary_string),
+    ('lat_destination', pa.float64()),
+    ('lon_destination', pa.float64()),
+    ('average_daily_flights', pa.float64()),
+    ('month', pa.string()),
+])
+
+movements_partitioning = ds.partitioning(
+    pa.schema([('month', pa.string()), ('origin', pa.string())]), flavor="hive")
+routes_partitioning = ds.partitioning(pa.schema([('month', pa.string())]), flavor="hive")
+
+
+#######################################
+# Conversion ##########################
+#######################################
+
+
+def normalise_departures(origin, departures):
+    """
+    Normalise the departures of one airport into a typed Arrow table.
+
+    Args:
+        origin (str): ICAO code of the departure airport.
+        departures (iterable): payloads.Departure records, as yielded by departures_io.iter_departures.
+
+    Returns:
+        pa.Table: One row per departure with the movements_schema columns.
+    """
+    columns = {name: [] for name in ('destination', 'scheduled_utc', 'aircraft_model', 'registration', 'airline')}
+    for departure in departures:
+        movement, aircraft = value(departure, "movement"), value(departure, "aircraft")
+        columns['destination'].append(value(value(movement, "airport"), "icao"))
+        columns['scheduled_utc'].append(value(value(movement, "scheduledTime"), "utc"))
+        columns['aircraft_model'].append(value(aircraft, "model"))
+        columns['registration'].append(value(aircraft, "reg"))
+        columns['airline'].append(value(value(departure, "airline"), "name"))
+
+    scheduled_utc = pc.strptime(pa.array(columns['scheduled_utc'], type=pa.string()),
+                                format="%Y-%m-%d %H:%MZ", unit='s', error_is_null=True)
+    scheduled_utc = scheduled_utc.cast(pa.timestamp('s', tz='UTC'))
+    return pa.table({
+        'destination': pa.array(columns['destination'], type=pa.string()).dictionary_encode(),
+        'scheduled_utc': scheduled_utc,
+        'aircraft_model': pa.array(columns['aircraft_model'], type=pa.string()).dictionary_encode(),
+        'registration': pa.array(columns['registration'], type=pa.string()).dictionary_encode(),
+        'airline': pa.array(columns['airline'], type=pa.string()).dictionary_encode(),
+        'month': pc.strftime(scheduled_utc, format="%Y-%m"),
+        'origin': pa.array([origin] * len(scheduled_utc), type=pa.string()),
+    }, schema=movements_schema)
+
+
+def stale_airport_origins(source_directory=airport_data_directory, store_directory=movements_store_directory):
+    """
+    Find the airports whose movements partitions are missing, outdated or without a departure file.
+
+    An airport is outdated if its departure file is newer than the oldest Parquet file of its
+    partitions; airports that were removed from the source folder are returned as well.
+
+    Args:
+        source_directory (Path, optional): Folder with the {ICAO_CODE}.jsonl / .json files.
+        store_directory (Path, optional): Root folder of the movements dataset.
+
+    Returns:
+        list: ICAO codes of the airports to convert, see convert_airport_data.
+    """
+    converted = {}
+    for path in Path(store_directory).glob("month=*/origin=*/*.parquet"):
+        origin = path.parent.name.partition("=")[2]
+        converted[origin] = min(converted.get(origin, path.stat().st_mtime), path.stat().st_mtime)
+
+    files = airport_files(source_directory)
+    stale_origins = [origin for origin, file_path in files.items()
+                     if origin not in converted or file_path.stat().st_mtime > converted[origin]]
+    return stale_origins + sorted(set(converted) - set(files))
+
+
+def convert_airport_data(source_directory=airport_data_directory, store_directory=movements_store_directory,
+                         origins=None):
+    """
+    Convert the per-airport departure files into the partitioned movements dataset.
+
+    Airports are converted one at a time, so memory use is bounded by the largest airport.
+    Departures without a parseable scheduled time are dropped.
+
+    Args:
+        source_directory (Path, optional): Folder with the {ICAO_CODE}.jsonl / .json files.
+        store_directory (Path, optional): Root folder of the movements dataset.
+        origins (list, optional): Airports to convert, see stale_airport_origins. Their existing
+                                  partitions are deleted first. Defaults to all airports.
+    """
+    files = airport_files(source_directory)
+    if origins is not None:
+        for origin in origins:
+            for partition in Path(store_directory).glob(f"month=*/origin={origin}"):
+                shutil.rmtree(partition)
+        files = {origin: files[origin] for origin in origins if origin in files}
+
+    for i, (origin, file_path) in enumerate(files.items()):
+        table = normalise_departures(origin, iter_departures(file_path))
+        table = table.filter(pc.is_valid(table['scheduled_utc']))
+        ds.write_dataset(
+            table, store_directory, format="parquet",
+            partitioning=movements_partitioning,
+            basename_template=f"{origin}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        if (i + 1) % 100 == 0:
+            print(f"Converted {i + 1} airports...")
+    print(f"Movements saved to {store_directory}")
+
+
+def normalise_routes(month, origin, routes_daily):
+    """
+    Normalise the routes/daily statistics of one airport and month into row dictionaries.
+
+    Args:
+        month (str): Name of the month folder, e.g. "04-April".
+        origin (str): ICAO code of the departure airport.
+        routes_daily (payloads.RoutesDaily): The decoded stats/routes/daily response.
+
+    Returns:
+        list: One dictionary per route with the routes_schema columns.
+    """
+    rows = []
+    for route in items(routes_daily, "routes"):
+        destination = value(route, "destination")
+        location = value(destination, "location")
+        rows.append({
+            'origin': origin,
+            'destination': value(destination, "icao"),
+            'destination_name': value(destination, "name"),
+            'destination_country_code': value(destination, "countryCode"),
+            'lat_destination': value(location, "lat"),
+            'lon_destination': value(location, "lon"),
+            'average_daily_flights': value(route, "averageDailyFlights"),
+            'month': month,
+        })
+    return rows
+
+
+def stale_connection_months(source_directory=connection_data_directory, store_directory=routes_store_directory):
+    """
+    Find the months of connection_data whose routes partition is missing or outdated.
+
+    A partition is outdated if any file of its month folder, or the folder itself (files added
+    or removed), is newer than the oldest Parquet file of the partition.
+
+    Args:
+        source_directory (Path, optional): The connection_data folder.
+        store_directory (Path, optional): Root folder of the routes dataset.
+
+    Returns:
+        list: Names of the month folders to convert, e.g. ["04-April"].
+    """
+    stale_months = []
+    for month_directory in sorted(p for p in Path(source_directory).iterdir() if p.is_dir()):
+        partition_files = list((Path(store_directory) / f"month={month_directory.name}").glob("*.parquet"))
+        if not partition_files:
+            stale_months.append(month_directory.name)
+            continue
+        converted = min(path.stat().st_mtime for path in partition_files)
+        source_paths = [month_directory, *month_directory.glob("*.json")]
+        if any(path.stat().st_mtime > converted for path in source_paths):
+            stale_months.append(month_directory.name)
+    return stale_months
+
+
+def convert_connection_data(source_directory=connection_data_directory, store_directory=routes_store_directory,
+                            months=None):
+    """
+    Convert the connection_data/<month>/{ICAO_CODE}.json route statistics into the routes dataset.
+
+    Args:
+        source_directory (Path, optional): The connection_data folder.
+        store_directory (Path, optional): Root folder of the routes dataset.
+        months (list, optional): Month folders to convert, see stale_connection_months. Defaults to all months.
+    """
+    for month_directory in sorted(p for p in Path(source_directory).iterdir() if p.is_dir()):
+        month = month_directory.name
+        if months is not None and month not in months:
+            continue
+        rows = []
+        for file_path in sorted(month_directory.glob("*.json")):
+            try:
+                with open(file_path, 'rb') as f:
+                    rows.extend(normalise_routes(month, file_path.stem, payloads.decode_routes_daily(f.read())))
+            except payloads.DecodeError:
+                print(f"Error decoding JSON from file {file_path}")
+        table = pa.Table.from_pylist(rows, schema=routes_schema)
+        ds.write_dataset(
+            table, store_directory, format="parquet",
+            partitioning=routes_partitioning,
+            basename_template=f"{month}-{{i}}.parquet",
+            existing_data_behavior="delete_matching",
+        )
+        print(f"Routes for {month} saved.")
+
+
+#######################################
+# Readers #############################
+#######################################
+
+
+def _read(store_directory, schema, partitioning, columns, filters):
+    dataset = ds.dataset(store_directory, schema=schema, format="parquet", partitioning=partitioning)
+    expression = None
+    for name, values in filters.items():
+        if values is not None:
+            condition = ds.field(name).isin(list(values))
+            expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def read_movements(columns=None, months=None, origins=None, store_directory=movements_store_directory):
+    """
+    Read flight movements from the columnar store.
+
+    Args:
+        columns (list, optional): Columns to read. Defaults to all columns.
+        months (list, optional): "YYYY-MM" partitions to read. Defaults to all months.
+        origins (list, optional): Origin ICAO partitions to read. Defaults to all airports.
+        store_directory (Path, optional): Root folder of the movements dataset.
+
+    Returns:
+        pd.DataFrame: The selected movements; string columns are categoricals.
+    """
+    return _read(store_directory, movements_schema, movements_partitioning, columns,
+                 {'month': months, 'origin': origins})
+
+
+def read_routes(columns=None, months=None, origins=None, store_directory=routes_store_directory):
+    """
+    Read route statistics from the columnar store.
+
+    Args:
+        columns (list, optional): Columns to read. Defaults to all columns.
+        months (list, optional): Month folder names to read, e.g. ["04-April"]. Defaults to all months.
+        origins (list, optional): Origin ICAO codes to keep. Defaults to all airports.
+        store_directory (Path, optional): Root folder of the routes dataset.
+
+    Returns:
+        pd.DataFrame: The selected routes; string columns are categoricals.
+    """
+    return _read(store_directory, routes_schema, routes_partitioning, columns,
+                 {'month': months, 'origin': origins})
+
+
+#######################################
+# Convert the raw JSON files ##########
+#######################################
+
+if __name__ == "__main__":
+    if airport_data_directory.exists():
+        convert_airport_data()
+    if connection_data_directory.exists():
+        convert_connection_data()
@@ -0,0 +1,348 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+from functools import lru_cache
+import json
+from typing import List, Optional, Union, get_args, get_origin, get_type_hints
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+#######################################
+# Decoding backend ####################
+#######################################
+
+"""
+    Shared decoding layer for the AeroDataBox payloads.
+
+    msgspec is optional (see api_aerodatabox/environment.yml). With msgspec,
+    documents are decoded straight into the typed schemas below, validating
+    them and skipping every field that is not part of a schema. Documents
+    that do not match a schema (e.g. a nested object replaced by a plain
+    string) are converted leniently instead of being rejected: values of the
+    wrong type become None and malformed list entries are dropped.
+
+    Without msgspec, documents are parsed with orjson or the standard json
+    module and returned as plain dicts and lists, as fast as json.loads.
+    Callers therefore read fields with value(), items() and set_value(),
+    which accept both a schema instance and a dict, and treat anything else
+    (None, an "N/A" string) as a missing object.
+"""
+
+if msgspec is not None:
+    backend = "msgspec"
+elif orjson is not None:
+    backend = "orjson"
+else:
+    backend = "json"
+
+# Raised for documents that are not valid JSON
+if msgspec is not None:
+    DecodeError = (json.JSONDecodeError, msgspec.DecodeError)
+else:
+    DecodeError = json.JSONDecodeError
+
+
+def loads(data):
+    """
+    Parse a JSON document into Python objects with the fastest available library.
+
+    Args:
+        data (bytes or str): The JSON document.
+
+    Returns:
+        The decoded dicts, lists and values.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+#######################################
+# Schemas #############################
+#######################################
+
+"""
+    Only the fields the repository consumes are declared; field names follow
+    the API. Fields the API (or data_collection.py) fills with an "N/A"
+    string instead of an object are typed Union[..., str, None].
+
+    With msgspec the schemas are msgspec Structs, which it decodes into
+    without building intermediate dicts; otherwise they only document the
+    fields of the decoded dicts.
+"""
+
+if msgspec is not None:
+    class Record(msgspec.Struct, gc=False):
+        """Base class of all schemas."""
+
+    def record(cls):
+        return cls
+
+    def empty_list():
+        return msgspec.field(default_factory=list)
+else:
+    class Record:
+        """Base class of all schemas."""
+
+    def record(cls):
+        return cls
+
+    def empty_list():
+        return []
+
+
+@record
+class Location(Record):
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+
+# Airport detail: airports/icao/{icao}
+
+@record
+class Country(Record):
+    code: Optional[str] = None
+    name: Optional[str] = None
+
+
+@record
+class Continent(Record):
+    code: Optional[str] = None
+    name: Optional[str] = None
+
+
+@record
+class AirportDetail(Record):
+    icao: Optional[str] = None
+    fullName: Optional[str] = None
+    location: Optional[Location] = None
+    country: Optional[Country] = None
+    continent: Optional[Continent] = None
+
+
+# Route statistics: airports/icao/{icao}/stats/routes/daily/{date}
+
+@record
+class RouteDestination(Record):
+    icao: Optional[str] = None
+    name: Optional[str] = None
+    countryCode: Optional[str] = None
+    location: Optional[Location] = None
+
+
+@record
+class Route(Record):
+    destination: Optional[RouteDestination] = None
+    averageDailyFlights: Optional[float] = None
+
+
+@record
+class RoutesDaily(Record):
+    routes: List[Route] = empty_list()
+
+
+# Flight information display (FIDS) departures: flights/airports/icao/{icao}/{start}/{end}
+
+@record
+class MovementAirport(Record):
+    icao: Optional[str] = None
+    name: Optional[str] = None
+
+
+@record
+class ScheduledTime(Record):
+    utc: Optional[str] = None
+
+
+@record
+class Movement(Record):
+    airport: Union[MovementAirport, str, None] = None
+    scheduledTime: Union[ScheduledTime, str, None] = None
+
+
+@record
+class Aircraft(Record):
+    model: Optional[str] = None
+    reg: Optional[str] = None
+
+
+@record
+class Airline(Record):
+    name: Optional[str] = None
+
+
+@record
+class Departure(Record):
+    movement: Union[Movement, str, None] = None
+    aircraft: Union[Aircraft, str, None] = None
+    airline: Union[Airline, str, None] = None
+    origin: Optional[str] = None  # ICAO code of the departure airport, set by the loaders
+
+
+@record
+class FidsDepartures(Record):
+    departures: List[Departure] = empty_list()
+
+
+@record
+class DepartureWindow(Record):
+    """One line of a case_study/airport_data/{ICAO_CODE}.jsonl file, see case_study/departures_io.py."""
+    window: Optional[str] = None
+    departures: List[Departure] = empty_list()
+
+
+def value(record, name):
+    """
+    Return a field of a decoded record.
+
+    Args:
+        record: A schema instance or dict, or None / an "N/A" string in its place.
+        name (str): The field name.
+
+    Returns:
+        The field value, None if the record is neither a schema instance nor a dict.
+    """
+    if isinstance(record, Record):
+        return getattr(record, name)
+    if isinstance(record, dict):
+        return record.get(name)
+    return None
+
+
+def items(record, name):
+    """
+    Return the records of a list field of a decoded record, e.g. the routes of a RoutesDaily.
+
+    Args:
+        record: A schema instance or dict, or None / an "N/A" string in its place.
+        name (str): The field name.
+
+    Returns:
+        list: The entries that are schema instances or dicts, [] if the field is not a list.
+    """
+    entries = value(record, name)
+    if not isinstance(entries, list):
+        return []
+    if msgspec is not None and isinstance(record, Record):
+        return entries  # Already validated by msgspec
+    return [entry for entry in entries if isinstance(entry, (Record, dict))]
+
+
+def set_value(record, name, field_value):
+    """Set a field of a decoded record, see value."""
+    if isinstance(record, dict):
+        record[name] = field_value
+    else:
+        setattr(record, name, field_value)
+
+
+#######################################
+# Typed decoding ######################
+#######################################
+
+
+@lru_cache(maxsize=None)
+def _decoder(schema):
+    return msgspec.json.Decoder(schema)
+
+
+def _is_record(schema):
+    return isinstance(schema, type) and issubclass(schema, Record)
+
+
+@lru_cache(maxsize=None)
+def _converter(schema):
+    """Build a function leniently converting parsed JSON into a msgspec schema type."""
+    if get_origin(schema) is Union:
+        options = get_args(schema)
+        records = [option for option in options if _is_record(option)]
+        plain = _converter(str if str in options else next(o for o in options if o is not type(None)))
+        if not records:
+            return plain
+        convert_record = _converter(records[0])
+        return lambda obj: convert_record(obj) if isinstance(obj, dict) else plain(obj)
+
+    if get_origin(schema) in (list, List):
+        convert_item = _converter(get_args(schema)[0])
+
+        def convert_list(obj):
+            if not isinstance(obj, list):
+                return []
+            items = [convert_item(item) for item in obj]
+            return [item for item in items if item is not None]
+        return convert_list
+
+    if _is_record(schema):
+        field_converters = [(name, _converter(hint)) for name, hint in get_type_hints(schema).items()]
+
+        def convert_record(obj):
+            if not isinstance(obj, dict):
+                return None
+            return schema(*[convert(obj.get(name)) for name, convert in field_converters])
+        return convert_record
+
+    if schema is float:
+        return lambda obj: float(obj) if isinstance(obj, (int, float)) and not isinstance(obj, bool) else None
+    return lambda obj: obj if isinstance(obj, schema) else None
+
+
+def decode(data, schema):
+    """
+    Decode a JSON document into a schema type.
+
+    Args:
+        data (bytes or str): The JSON document.
+        schema (type): A schema class such as RoutesDaily, or e.g. List[Departure].
+
+    Returns:
+        The decoded document; without msgspec the parsed dicts and lists.
+
+    Raises:
+        DecodeError: If data is not valid JSON.
+    """
+    if msgspec is None:
+        return loads(data)
+    try:
+        return _decoder(schema).decode(data)
+    except msgspec.ValidationError:
+        return _converter(schema)(loads(data))  # Decode the document again, leniently
+
+
+def decode_airport_detail(data):
+    """Decode an airports/icao/{icao} response, see AirportDetail."""
+    return decode(data, AirportDetail)
+
+
+def decode_routes_daily(data):
+    """Decode a stats/routes/daily response, see RoutesDaily."""
+    return decode(data, RoutesDaily)
+
+
+def decode_fids_departures(data):
+    """Decode a flights/airports/icao departures response, see FidsDepartures."""
+    return decode(data, FidsDepartures)
+
+
+def decode_departures(data):
+    """Decode a legacy case_study/airport_data/{ICAO_CODE}.json file holding a flat list of departures."""
+    departures = decode(data, List[Departure])
+    if msgspec is None:
+        departures = items({"departures": departures}, "departures")
+    return departures
+
+
+def decode_departure_window(data):
+    """Decode one line of a case_study/airport_data/{ICAO_CODE}.jsonl file, see DepartureWindow."""
+    return decode(data, DepartureWindow)
@@ -2,22 +2,19 @@
 # IMPORTS #############################
 #######################################
 
-import json
-from pathlib import Path
-import pandas as pd
-import data_preperation
-
-# Determine the current directory
-current_directory = Path(__file__).resolve().parent
-
-# Add the path to the api_aerodatabox folder to sys.path
-api_aerodatabox_path = current_directory.parents[0] / 'api_aerodatabox'
+import data_service
 
 
 #######################################
 # Functions ###########################
 #######################################
 
+"""
+    The checks run on every keystroke, so they use the registry already in
+    memory without checking the airport files for changes; new airport data
+    is picked up after data_service.clear().
+"""
+
 
 def ICAO_check(argument):
     """
@@ -29,31 +26,7 @@ def ICAO_check(argument):
     Returns:
         bool: True if the ICAO code exists in the airport list, False otherwise.
     """
-
-    # Read airports data
-    file_path = api_aerodatabox_path / "airport_data" / "Available_Airports.json"
-    try:
-        with open(file_path, 'r') as f:
-            airports_icao = json.load(f)
-    except json.decoder.JSONDecodeError as e:
-        print(f"Error: Invalid JSON format in {file_path}: {e}")
-        return False  # Return False if there's an error reading JSON
-
-    # Extract airport information
-    airport_list = [{'icao': airport_loc} for airport_loc in airports_icao['items']]
-    airport_list_df = pd.DataFrame(airport_list)
-
-    # Check if argument exists in the DataFrame
-    check = False
-    for index, row in airport_list_df.iterrows():
-        airport = row['icao']
-        if argument == airport:
-            check = True
-            break  # Stop iteration once a match is found
-    return check
-
-
-airport_df = data_preperation.prepare_airport_data()
+    return argument in data_service.airport_registry(refresh=False)
 
 
 def airport_location(location):
@@ -64,9 +37,6 @@ def airport_location(location):
         location (str): The ICAO code of the airport.
 
     Returns:
-        tuple: A tuple containing the latitude and longitude of the airport, or None if not found.
+        tuple: A tuple containing the latitude and longitude of the airport, or (None, None) if not found.
     """
-    for index, row in airport_df.iterrows():
-        airport = row['icao']
-        if location == airport:
-            return row['lat'], row['lon']
+    return data_service.airport_registry(refresh=False).location(location)
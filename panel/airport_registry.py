@@ -0,0 +1,95 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+from bisect import bisect_left
+import json
+
+
+#######################################
+# Airport registry ####################
+#######################################
+
+"""
+    In-memory registry of the available airports, built once from
+    Available_Airports.json and the airport details, see
+    data_service.airport_registry. Lookups are hash-based and need no I/O.
+"""
+
+
+class AirportRegistry:
+    """
+    Available airports with their locations.
+
+    Args:
+        codes (iterable): ICAO codes of all available airports.
+        airport_df (pd.DataFrame, optional): Airport details as returned by
+                                             data_preperation.prepare_airport_data.
+    """
+
+    def __init__(self, codes, airport_df=None):
+        self.codes = frozenset(codes)
+        self.sorted_codes = sorted(self.codes)
+        self.details = {}
+        if airport_df is not None:
+            for icao, lat, lon, name, country in zip(airport_df['icao'].tolist(), airport_df['lat'].tolist(),
+                                                     airport_df['lon'].tolist(), airport_df['airport_name'].tolist(),
+                                                     airport_df['country'].tolist()):
+                self.details.setdefault(icao, (lat, lon, name, country))
+
+    def __contains__(self, code):
+        return code in self.codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def contains(self, codes):
+        """Return for every ICAO code whether the airport is available."""
+        return [code in self.codes for code in codes]
+
+    def location(self, code):
+        """Return the (latitude, longitude) of an airport, (None, None) if unknown."""
+        details = self.details.get(code)
+        return (None, None) if details is None else details[:2]
+
+    def locations(self, codes):
+        """Return the (latitude, longitude) of every airport, (None, None) for unknown ones."""
+        return [self.location(code) for code in codes]
+
+    def search(self, prefix, limit=None):
+        """
+        Find the available airports whose ICAO code starts with a prefix, e.g. for autocompletion.
+
+        Args:
+            prefix (str): The start of the ICAO code.
+            limit (int, optional): Maximum number of codes to return.
+
+        Returns:
+            list: The matching ICAO codes in alphabetical order.
+        """
+        matches = []
+        for code in self.sorted_codes[bisect_left(self.sorted_codes, prefix):]:
+            if not code.startswith(prefix) or (limit is not None and len(matches) >= limit):
+                break
+            matches.append(code)
+        return matches
+
+
+def load_airport_registry(available_airports_path, airport_df):
+    """
+    Build the registry from Available_Airports.json and the airport details.
+
+    Args:
+        available_airports_path (Path): Path to Available_Airports.json.
+        airport_df (pd.DataFrame): Airport details as returned by data_preperation.prepare_airport_data.
+
+    Returns:
+        AirportRegistry: The registry, without airports if the JSON is invalid.
+    """
+    try:
+        with open(available_airports_path, 'r') as f:
+            airports_icao = json.load(f)
+    except json.decoder.JSONDecodeError as e:
+        print(f"Error: Invalid JSON format in {available_airports_path}: {e}")
+        return AirportRegistry([], airport_df)
+    return AirportRegistry(airports_icao['items'], airport_df)
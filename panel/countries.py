@@ -0,0 +1,69 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+
+#######################################
+# Paths ###############################
+#######################################
+
+current_directory = Path(__file__).resolve().parent
+country_codes_path = current_directory / "data" / "CountryCodes.json"
+
+
+#######################################
+# Data preparation ####################
+#######################################
+
+# Load the two-letter ICAO prefix -> Alpha-3 country code mapping
+with open(country_codes_path, 'r') as file:
+    country_codes = json.load(file)
+
+
+#######################################
+# Functions ###########################
+#######################################
+
+"""
+    ICAO codes are mapped to countries by their first two letters, except
+    for the contiguous United States, whose airports all start with 'K'.
+"""
+
+
+def country_of(icao_code, default=None):
+    """
+    Get the Alpha-3 country code of an airport.
+
+    Args:
+        icao_code (str): The ICAO code (or its two-letter prefix).
+        default: Returned if the prefix is unknown.
+
+    Returns:
+        str: The Alpha-3 country code, e.g. "USA".
+    """
+    if icao_code.startswith('K'):
+        return "USA"
+    return country_codes.get(icao_code[:2], default)
+
+
+def countries_of(icao_codes, default=None):
+    """
+    Get the Alpha-3 country codes of many airports at once.
+
+    Args:
+        icao_codes (array-like): ICAO codes.
+        default: Used for unknown prefixes.
+
+    Returns:
+        np.ndarray: The Alpha-3 country code of every airport.
+    """
+    icao_codes = pd.Series(np.asarray(icao_codes, dtype=object), dtype=object)
+    countries = icao_codes.str[:2].map(country_codes).to_numpy(dtype=object)
+    countries[icao_codes.str.startswith('K', na=False).to_numpy(dtype=bool)] = "USA"
+    countries[pd.isna(countries)] = default
+    return countries
@@ -2,9 +2,7 @@
 # IMPORTS #############################
 #######################################
 
-import sys
 from pathlib import Path
-import json
 import pandas as pd
 import plotly.graph_objects as go
 from matplotlib import cm
@@ -18,13 +16,10 @@ import numpy as np
 
 current_directory = Path(__file__).resolve().parent
 country_coord = current_directory / "data" / "country-coord.csv"
-country_codes = current_directory / "data" / "CountryCodes.json"
-
-api_aerodatabox_path = current_directory.parents[0] / 'api_aerodatabox'
-sys.path.insert(0, str(api_aerodatabox_path))
 
 # Local imports
-from data_transformation_pandas import process_flight_connections
+import data_service
+from country_flows import load_country_flows
 
 
 #######################################
@@ -64,60 +59,57 @@ comparison_map.update_layout(
 #######################################
 
 
-# get all connections as DataFrame and drop not needed colums
-flight_data_df, x = process_flight_connections("Year")
-flight_data_dropped_df = flight_data_df.drop(columns=['departure_country', 'lat_departure', 'lon_departure', 'lat_destination', 'lon_destination', 'departure_airport_name', 'departure_continent'])
+# Source key of the data the frames below were derived from
+data_key = None
 
-# Load the country codes from JSON file
-with open(country_codes, 'r') as file:
-    country_codes = json.load(file)
 
-# Load the coordinates of all countries into df
-country_coord_df = pd.read_csv(country_coord)
+def prepare_data():
+    """
+    Derive the flows between all pairs of countries and the country colors from the yearly flight data.
 
-# Add country codes for departure and destination to flight_data_dropped_df
-for index, row in flight_data_dropped_df.iterrows():
-    departure_code = row['icao_departure']
-    destination_code = row['icao_destination']
+    They are only derived again after data_service reports changed source files.
+    """
+    global data_key, country_map_grouped_df, color_map_df, country_colors
+    key = data_service.source_key(("flight_connections", "Year"))
+    if key == data_key:
+        return
 
-    # Determine country code for departure airport
-    if departure_code.startswith('K'):
-        country_code_departure = "USA"
-    else:
-        first_two_letters_departure = departure_code[:2]
-        country_code_departure = country_codes.get(first_two_letters_departure, 'ZZZZ')
+    # Load the average daily flights between all pairs of countries (rebuilt if outdated)
+    flows, flow_countries = load_country_flows()
+    flows = flows.tocoo()
 
-    # Determine country code for destination airport
-    if destination_code.startswith('K'):
-        country_code_destination = "USA"
-    else:
-        first_two_letters_destination = destination_code[:2]
-        country_code_destination = country_codes.get(first_two_letters_destination, 'ZZZZ')
+    # Load the coordinates of all countries into df
+    country_coord_df = pd.read_csv(country_coord)
 
-    # Assign the country codes to new columns in the DataFrame
-    flight_data_dropped_df.at[index, 'country_code_departure'] = country_code_departure
-    flight_data_dropped_df.at[index, 'country_code_destination'] = country_code_destination
+    # Sum of the 'averageDailyFlights' per 'country_code_departure' and 'country_code_destination'
+    combined_flights = pd.DataFrame({
+        'country_code_departure': flow_countries[flows.row],
+        'country_code_destination': flow_countries[flows.col],
+        'averageDailyFlights': flows.data,
+    })
 
-# Group by 'country_code_departure' and 'country_code_destination' and sum the 'averageDailyFlights'
-combined_flights = flight_data_dropped_df.groupby(['country_code_departure', 'country_code_destination'], as_index=False).agg({'averageDailyFlights': 'sum'})
+    # Rename Departure_airport column inorder to combine it with coordinates of countires
+    combined_flights.columns = ["Alpha-3 code", "country_code_destination", "Total Departing Flights"]
 
-# Rename Departure_airport column inorder to combine it with coordinates of countires
-combined_flights.columns = ["Alpha-3 code", "country_code_destination", "Total Departing Flights"]
+    # Merge with the coordinates DataFrame (df) on 'Alpha-3 code' and drop not needed columns
+    country_map_grouped_df = pd.merge(combined_flights, country_coord_df, on='Alpha-3 code', how='left')
+    country_map_grouped_df = country_map_grouped_df.drop(columns=['Alpha-2 code', "Numeric code"])
 
-# Merge with the coordinates DataFrame (df) on 'Alpha-3 code' and drop not needed columns
-country_map_grouped_df = pd.merge(combined_flights, country_coord_df, on='Alpha-3 code', how='left')
-country_map_grouped_df = country_map_grouped_df.drop(columns=['Alpha-2 code', "Numeric code"])
+    # Rename Destination_airport column inorder to combine it with coordinates of countires
+    country_map_grouped_df.columns = ["country_code_departure", "Alpha-3 code", "Total Departing Flights", "departure_country", "lat_departure", "lon_departure"]
 
-# Rename Destination_airport column inorder to combine it with coordinates of countires
-country_map_grouped_df.columns = ["country_code_departure", "Alpha-3 code", "Total Departing Flights", "departure_country", "lat_departure", "lon_departure"]
+    # Merge with the coordinates DataFrame (df) on 'Alpha-3 code' and drop not needed columns
+    country_map_grouped_df = pd.merge(country_map_grouped_df, country_coord_df, on='Alpha-3 code', how='left')
+    country_map_grouped_df = country_map_grouped_df.drop(columns=['Country', 'Alpha-2 code', "Numeric code"])
 
-# Merge with the coordinates DataFrame (df) on 'Alpha-3 code' and drop not needed columns
-country_map_grouped_df = pd.merge(country_map_grouped_df, country_coord_df, on='Alpha-3 code', how='left')
-country_map_grouped_df = country_map_grouped_df.drop(columns=['Country', 'Alpha-2 code', "Numeric code"])
+    # Rename all columns for clearity, and round 'total departing flights' to 2 decimal numbers
+    country_map_grouped_df.columns = ["country_code_departure", "country_code_destination", "Total Departing Flights", "departure_country", "lat_departure", "lon_departure", "lat_destination", "lon_destination"]
+    country_map_grouped_df["Total Departing Flights"] = country_map_grouped_df["Total Departing Flights"].apply(lambda x: round(x, 2))
 
-# Rename all columns for clearity, and round 'total departing flights' to 2 decimal numbers
-country_map_grouped_df.columns = ["country_code_departure", "country_code_destination", "Total Departing Flights", "departure_country", "lat_departure", "lon_departure", "lat_destination", "lon_destination"]
-country_map_grouped_df["Total Departing Flights"] = country_map_grouped_df["Total Departing Flights"].apply(lambda x: round(x, 2))
+    # create df with countries and corresponding colors
+    color_map_df = get_colors_for_airports(get_unique_departure_countires())
+    country_colors = dict(zip(color_map_df['departure_country'], color_map_df['color']))
+    data_key = key
 
 
 #######################################
@@ -171,15 +163,15 @@ def get_colors_for_airports(list):
 #######################################
 
 
-# create df with countries and corresponding colors
-color_map_df = get_colors_for_airports(get_unique_departure_countires())
+# Derive the country flows and colors, see prepare_data
+prepare_data()
 
 
 # function for plotting
-def add_flight_routes(departure_country):
-    global comparison_map, country_map_grouped_df, color_map_df
+def add_flight_routes(departure_country, fig=comparison_map):
+    global country_map_grouped_df, country_colors
 
-    clear_map(comparison_map)
+    clear_map(fig)
 
     # Filter the DataFrame for the specified departure country and reset index
     filtered_df = country_map_grouped_df[(country_map_grouped_df['departure_country'] == departure_country)]
@@ -197,70 +189,75 @@ def add_flight_routes(departure_country):
     scaled_sizes = ((scaled_sizes - scaled_sizes.min()) /
                     (scaled_sizes.max() - scaled_sizes.min()) *
                     (max_size - min_size)) + min_size
-
-    # Separate lists to store traces for domestic flights and other flights
-    traces_domestic = []
-    traces_other = []
-
-    for i in range(len(filtered_df)):
-        departure_country = filtered_df.loc[i, 'departure_country']
-        # get right color for plotting lines and markers
-        color = color_map_df.loc[color_map_df['departure_country'] == departure_country, 'color'].values[0]
-
-        # Plot a Red marker for domestic flights
-        if filtered_df.loc[i, 'country_code_departure'] == filtered_df.loc[i, 'country_code_destination']:
-            trace = go.Scattergeo(
-                lon=[filtered_df.loc[i, 'lon_departure']],
-                lat=[filtered_df.loc[i, 'lat_departure']],
-                mode='markers',
-                marker=dict(
-                    size=scaled_sizes[i],  # Set marker size based on 'Total Departing Flights'
-                    color='Red',  # Marker color for domestic flights
-                    opacity=0.7,
-                    line=dict(color='black', width=1)
-                ),
-                hoverinfo='text',
-                text=f"Number of Domestic flights in {departure_country}: {filtered_df.loc[i, 'Total Departing Flights']}",
-                showlegend=False,
-            )
-            traces_domestic.append(trace)
-
-        else:
-            # Plot line connecting departure and destination country
-            trace_line = go.Scattergeo(
-                lon=[filtered_df.loc[i, 'lon_departure'], filtered_df.loc[i, 'lon_destination']],
-                lat=[filtered_df.loc[i, 'lat_departure'], filtered_df.loc[i, 'lat_destination']],
-                mode='lines',
-                line=dict(
-                    width=scaled_sizes[i] / 7,  # Set line width based on 'Total Departing Flights'
-                    color=color,  # Use dynamically fetched color
-                ),
-                hoverinfo='skip',
-                opacity=0.8,
-                showlegend=False,
-            )
-            traces_other.append(trace_line)
-
-            # Plot destination country as a marker with scaled size
-            trace_marker = go.Scattergeo(
-                lon=[filtered_df.loc[i, 'lon_destination']],
-                lat=[filtered_df.loc[i, 'lat_destination']],
-                mode='markers',
-                marker=dict(
-                    size=scaled_sizes[i],  # Set marker size based on 'Total Departing Flights'
-                    color=color,  # Use dynamically fetched color
-                    opacity=0.7,
-                    line=dict(color='black', width=1),
-                ),
-                hoverinfo='text',
-                text=f"Country: {filtered_df.loc[i, 'country_code_destination']}<br>"
-                     f"Total Departing Flights from {departure_country} to {filtered_df.loc[i, 'country_code_destination']} : {filtered_df.loc[i, 'Total Departing Flights']}",
-                showlegend=False,
-            )
-            traces_other.append(trace_marker)
-
-    # Add all traces for domestic flights first, followed by other flights
-    for trace in traces_other:
-        comparison_map.add_trace(trace)
-    for trace in traces_domestic:
-        comparison_map.add_trace(trace)
+    scaled_sizes = scaled_sizes.to_numpy()
+
+    # get right color for plotting lines and markers
+    color = country_colors.get(departure_country)
+
+    # Separate domestic flights from flights to other countries
+    domestic = (filtered_df['country_code_departure'] == filtered_df['country_code_destination']).to_numpy()
+    domestic_df, other_df = filtered_df[domestic], filtered_df[~domestic]
+    domestic_sizes, other_sizes = scaled_sizes[domestic], scaled_sizes[~domestic]
+
+    traces = []
+
+    # Plot lines connecting departure and destination countries, one trace of NaN-separated lines
+    # per line width (rounded up to 0.5 px) as a trace can only have one width
+    line_widths = np.ceil(other_sizes / 7 * 2) / 2  # Set line width based on 'Total Departing Flights'
+    for width in np.unique(line_widths):
+        lines_df = other_df[line_widths == width]
+        lon = np.full(3 * len(lines_df), np.nan)
+        lat = np.full(3 * len(lines_df), np.nan)
+        lon[0::3], lon[1::3] = lines_df['lon_departure'], lines_df['lon_destination']
+        lat[0::3], lat[1::3] = lines_df['lat_departure'], lines_df['lat_destination']
+        traces.append(go.Scattergeo(
+            lon=lon,
+            lat=lat,
+            mode='lines',
+            line=dict(
+                width=width,
+                color=color,  # Use the color of the departure country
+            ),
+            hoverinfo='skip',
+            opacity=0.8,
+            showlegend=False,
+        ))
+
+    # Plot destination countries as markers with scaled sizes
+    traces.append(go.Scattergeo(
+        lon=other_df['lon_destination'],
+        lat=other_df['lat_destination'],
+        mode='markers',
+        marker=dict(
+            size=other_sizes,  # Set marker size based on 'Total Departing Flights'
+            color=color,  # Use the color of the departure country
+            opacity=0.7,
+            line=dict(color='black', width=1),
+        ),
+        hoverinfo='text',
+        text=[f"Country: {destination}<br>"
+              f"Total Departing Flights from {departure_country} to {destination} : {flights}"
+              for destination, flights in zip(other_df['country_code_destination'].tolist(),
+                                              other_df['Total Departing Flights'].tolist())],
+        showlegend=False,
+    ))
+
+    # Plot a Red marker for domestic flights
+    traces.append(go.Scattergeo(
+        lon=domestic_df['lon_departure'],
+        lat=domestic_df['lat_departure'],
+        mode='markers',
+        marker=dict(
+            size=domestic_sizes,  # Set marker size based on 'Total Departing Flights'
+            color='Red',  # Marker color for domestic flights
+            opacity=0.7,
+            line=dict(color='black', width=1)
+        ),
+        hoverinfo='text',
+        text=[f"Number of Domestic flights in {departure_country}: {flights}"
+              for flights in domestic_df['Total Departing Flights'].tolist()],
+        showlegend=False,
+    ))
+
+    # Add all traces at once, domestic flights on top
+    fig.add_traces(traces)
@@ -0,0 +1,86 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+from pathlib import Path
+import numpy as np
+import scipy.sparse
+
+import data_service
+from airport_index import load_labeled_matrix, save_labeled_matrix
+from countries import countries_of
+
+
+#######################################
+# Paths ###############################
+#######################################
+
+current_directory = Path(__file__).resolve().parent
+country_flows_path = current_directory / "data" / "country_flows"
+
+
+#######################################
+# Country flow matrix #################
+#######################################
+
+"""
+    Average daily flights between all pairs of countries over the whole
+    year, as a sparse country x country matrix. Airports are mapped to
+    Alpha-3 country codes by their ICAO prefix; airports of unknown prefixes
+    count as country "ZZZZ".
+
+    The matrix is saved as data/country_flows.npz with its labels by
+    running this module. Loading never writes to the data folder: if
+    flight_connections_Year.json is newer, the matrix is built in memory.
+
+    Usage: python country_flows.py rebuilds the matrix.
+"""
+
+
+def build_country_flows():
+    """
+    Sum the average daily flights of all connections per departure and destination country.
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix of daily flights, sorted Alpha-3 codes of its rows and columns).
+    """
+    flight_data_df, _ = data_service.flight_connections("Year")
+    departure_countries = countries_of(flight_data_df['icao_departure'], default='ZZZZ').astype(str)
+    destination_countries = countries_of(flight_data_df['icao_destination'], default='ZZZZ').astype(str)
+
+    countries, positions = np.unique(np.concatenate([departure_countries, destination_countries]), return_inverse=True)
+    rows, cols = np.split(positions, 2)
+    flows = scipy.sparse.csr_matrix((flight_data_df['averageDailyFlights'].to_numpy(dtype=float), (rows, cols)),
+                                    shape=(len(countries), len(countries)))
+    return flows, countries
+
+
+def _is_stale():
+    """Return True if the saved matrix is missing or older than the yearly connection data."""
+    flow_files = [country_flows_path.with_name(f"{country_flows_path.name}{suffix}.npz") for suffix in ("", "_labels")]
+    if not all(path.exists() for path in flow_files):
+        return True
+    connections_path = data_service.connection_data / "flight_connections_Year.json"
+    return connections_path.stat().st_mtime > min(path.stat().st_mtime for path in flow_files)
+
+
+def load_country_flows():
+    """
+    Load the saved country flow matrix, or build it in memory if the connection data changed.
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix of daily flights, Alpha-3 codes of its rows and columns).
+    """
+    if not _is_stale():
+        flows, countries, _ = load_labeled_matrix(country_flows_path)
+        if flows.shape == (len(countries), len(countries)):
+            return flows, countries
+
+    print(f"Building the country flows in memory; run python country_flows.py to save them to {country_flows_path}.npz")
+    return build_country_flows()
+
+
+if __name__ == "__main__":
+    flows, countries = build_country_flows()
+    save_labeled_matrix(country_flows_path, flows, countries)
+    print(f"Saved the flows between {len(countries)} countries ({flows.nnz} pairs) to {country_flows_path}.npz")
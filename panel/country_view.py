@@ -3,9 +3,8 @@
 #######################################
 
 import pandas as pd
-import sys
 from pathlib import Path
-import data_preperation
+import data_service
 import plotly.express as px
 import plotly.graph_objects as go
 
@@ -16,11 +15,6 @@ import plotly.graph_objects as go
 
 current_directory = Path(__file__).resolve().parent
 country_coord = current_directory / "data" / "country-coord.csv"
-api_aerodatabox_path = current_directory.parents[0] / 'api_aerodatabox'
-sys.path.insert(0, str(api_aerodatabox_path))
-
-# Local imports
-from data_transformation_pandas import process_flight_connections
 
 
 #######################################
@@ -28,6 +22,9 @@ from data_transformation_pandas import process_flight_connections
 #######################################
 
 
+# Colors of the continents, see prepare_data
+color_scale = px.colors.qualitative.Plotly
+
 # Create the blank world map
 country_map = go.Figure(data=go.Choropleth(
     locations=[],  # No data for countries
@@ -61,51 +58,69 @@ country_map.update_layout(
 #######################################
 
 
-# for country view ####################
+# Source key of the data the frames below were derived from
+data_key = None
+
+
+def prepare_data():
+    """
+    Derive the country and continent frames from the shared flight and airport data.
 
+    The frames are only derived again after data_service reports changed source files.
+    """
+    global data_key, country_map_filtered_df, continent_df, color_map
+    key = data_service.source_key(("flight_connections", "Year"), "airports")
+    if key == data_key:
+        return
 
-# Process flight connections to get DataFrames
-flight_data_df, daily_flights_df = process_flight_connections("Year")
-airport_df = data_preperation.prepare_airport_data()
+    # for country view ####################
 
-# Merge daily_flights_df with airport_df to add country code
-country_map_df = daily_flights_df.merge(airport_df[['airport_name', 'country_code']],
-                                        left_on='departure_airport_name', right_on='airport_name', how='left')
+    # Process flight connections to get DataFrames
+    flight_data_df, daily_flights_df = data_service.flight_connections("Year")
+    airport_df = data_service.airports()
 
-# Read the cpuntry coordinates file into a DataFrame
-country_coord_df = pd.read_csv(country_coord)
+    # Merge daily_flights_df with airport_df to add country code
+    country_map_df = daily_flights_df.merge(airport_df[['airport_name', 'country_code']],
+                                            left_on='departure_airport_name', right_on='airport_name', how='left')
 
-# Group by departure_country and sum the number of departing flights
-country_map_grouped_df = country_map_df.groupby('country_code')['number_of_total_flights'].sum().reset_index()
+    # Read the cpuntry coordinates file into a DataFrame
+    country_coord_df = pd.read_csv(country_coord)
 
-# Rename columns for clarity and consistency
-country_map_grouped_df.columns = ["Alpha-2 code", "Total Departing Flights"]
+    # Group by departure_country and sum the number of departing flights
+    country_map_grouped_df = country_map_df.groupby('country_code')['number_of_total_flights'].sum().reset_index()
 
-# Merge with the coordinates DataFrame (df) on 'Alpha-2 code'
-country_map_grouped_df = pd.merge(country_map_grouped_df, country_coord_df, on='Alpha-2 code', how='left')
+    # Rename columns for clarity and consistency
+    country_map_grouped_df.columns = ["Alpha-2 code", "Total Departing Flights"]
 
-# filter countries out with no coordinates and round 'total departing flights' to 2 decimal numbers
-country_map_filtered_df = country_map_grouped_df.dropna(subset=['Latitude (average)', 'Longitude (average)'])
-country_map_filtered_df["Total Departing Flights"] = country_map_filtered_df["Total Departing Flights"].round(2)
+    # Merge with the coordinates DataFrame (df) on 'Alpha-2 code'
+    country_map_grouped_df = pd.merge(country_map_grouped_df, country_coord_df, on='Alpha-2 code', how='left')
 
+    # filter countries out with no coordinates and round 'total departing flights' to 2 decimal numbers
+    country_map_filtered_df = country_map_grouped_df.dropna(subset=['Latitude (average)', 'Longitude (average)'])
+    country_map_filtered_df["Total Departing Flights"] = country_map_filtered_df["Total Departing Flights"].round(2)
 
+    # for continent view ####################
 
-# for continent view ####################
+    # Group by departure_country and sum the number of departing flights
+    continent_map_df = daily_flights_df.groupby('departure_continent')['number_of_total_flights'].sum().reset_index()
+    continent_loc = {
+            'departure_continent': ["Africa", "Asia", "Australia & Oceania", "Europe", "North America",  "South America"],
+            'lat': [10.0000, 40.0000, -27.000, 48.0000, 38.0000, -10.0000],
+            'lon': [20.0000, 95.0000, 133.0000, 9.0000, -97.0000, -55.0000],
+        }
+    continent_loc_df = pd.DataFrame(continent_loc)
+    continent_df = pd.merge(continent_map_df, continent_loc_df, on='departure_continent', how='left')
+    continent_df.columns = ["Continent", "Total Departing Flights", "lat", "lon"]
 
+    # Round the "Total Departing Flights" column to 2 decimal places
+    continent_df["Total Departing Flights"] = continent_df["Total Departing Flights"].round(2)
 
-# Group by departure_country and sum the number of departing flights
-continent_map_df = daily_flights_df.groupby('departure_continent')['number_of_total_flights'].sum().reset_index()
-continent_loc = {
-        'departure_continent': ["Africa", "Asia", "Australia & Oceania", "Europe", "North America",  "South America"],
-        'lat': [10.0000, 40.0000, -27.000, 48.0000, 38.0000, -10.0000],
-        'lon': [20.0000, 95.0000, 133.0000, 9.0000, -97.0000, -55.0000],
-    }
-continent_loc_df = pd.DataFrame(continent_loc)
-continent_df = pd.merge(continent_map_df, continent_loc_df, on='departure_continent', how='left')
-continent_df.columns = ["Continent", "Total Departing Flights", "lat", "lon"]
+    # Define a consistent color scale for the continents
+    color_map = {continent: color for continent, color in zip(continent_df["Continent"], color_scale)}
+    data_key = key
 
-# Round the "Total Departing Flights" column to 2 decimal places
-continent_df["Total Departing Flights"] = continent_df["Total Departing Flights"].round(2)
+
+prepare_data()
 
 
 #######################################
@@ -120,9 +135,9 @@ def clear_map(fig):
 
 
 # Function to create a choropleth map coloring countries based on departing flights
-def create_country_map():
+def create_country_map(fig=country_map):
     # Clear existing points
-    clear_map(country_map)
+    clear_map(fig)
 
     # Use Plotly Express to create a choropleth map
     choropleth = px.choropleth(
@@ -137,7 +152,7 @@ def create_country_map():
     )
 
     # Add the choropleth map to the existing world map
-    country_map.add_trace(choropleth.data[0])  # Add the choropleth to the existing figure
+    fig.add_trace(choropleth.data[0])  # Add the choropleth to the existing figure
 
 
 def create_pie_chart_country():
@@ -157,14 +172,9 @@ def create_pie_chart_country():
     return pie_chart
 
 
-# Define a consistent color scale for the continents
-color_scale = px.colors.qualitative.Plotly
-color_map = {continent: color for continent, color in zip(continent_df["Continent"], color_scale)}
-
-
-def create_continent_map():
+def create_continent_map(fig=country_map):
     # Clear existing points
-    clear_map(country_map)
+    clear_map(fig)
     # Use Plotly Express to add points
     scatter = px.scatter_geo(
         continent_df,
@@ -180,7 +190,7 @@ def create_continent_map():
     )
 
     # Add the points to the existing world map
-    country_map.add_trace(scatter.data[0])  # Add the scatter plot to the existing figure
+    fig.add_trace(scatter.data[0])  # Add the scatter plot to the existing figure
 
 
 # Create the Plotly pie chart
@@ -1,35 +1,21 @@
 import panel as pn
 import plotly.express as px
-import forecast_display
-from forecast_display import get_scaling_factors, get_sparse_value, df, most_flown_model
-from route_view import fig, add_airport_marker_departure, add_airport_marker_destination, reset_map
+from forecast_display import get_scaling_factors, get_sparse_value, df, most_flown_models, forecast_trajectories
+from session_state import get_session
+from countries import country_codes
 import airport_check
-from general_numbers import General_numbers_df, top_25_airports_df, top_25_connections_df
-from country_view import create_country_map, create_continent_map, country_map, create_pie_chart_continent, create_pie_chart_country
-from country_comparison import comparison_map, get_unique_departure_countires, add_flight_routes
-from world_view import create_connections
+import data_service
 import pandas as pd
 import plotly.graph_objects as go
-import json
-import os
 
 pn.extension('plotly', 'vega')
 
-# Load the country-coord.csv file
-country_coord_df = pd.read_csv('data/country-coord.csv', index_col=0)
+# Read-only data, loaded once per process and shared by all sessions
+country_coord_df = data_service.country_coordinates()
+yearly_seats_per_airport = data_service.yearly_seats_per_airport()
 
-# Load the CountryCodes.json file
-with open('data/CountryCodes.json') as json_file:
-    country_codes = json.load(json_file)
-
-# Load the Available_Airports.json file
-available_airports_path = os.path.join('..', 'api_aerodatabox', 'airport_data', 'Available_Airports.json')
-with open(available_airports_path) as json_file:
-    available_airports = json.load(json_file)
-
-# Load the yearly seats per airport data
-with open('data/yearly_seats_per_airport.json') as json_file:
-    yearly_seats_per_airport = json.load(json_file)
+# Routes, forecasts and route map of this session
+session = get_session()
 
 # Function to get ICAO codes
 def get_icao_codes(country_name):
@@ -43,16 +29,8 @@ def get_icao_codes(country_name):
 
 # Function to find all ICAO codes that start with the given two-letter codes
 def find_matching_icao_codes(two_letter_codes):
-    matching_icao_codes = []
-    print(f"Two-letter codes to match: {two_letter_codes}")  # Debugging line
-
-    for icao_code in available_airports['items']:
-        print(f"Checking ICAO code: {icao_code}")  # Debugging line
-        if icao_code[:2] in two_letter_codes:
-            print(f"Match found: {icao_code}")  # Debugging line
-            matching_icao_codes.append(icao_code)
-
-    return matching_icao_codes
+    icao_codes = pd.Series(data_service.airport_registry().sorted_codes)
+    return icao_codes[icao_codes.str[:2].isin(two_letter_codes)].tolist()
 
 # Function to get the initial departing PAX for the given ICAO codes
 def get_initial_departing_pax(icao_codes):
@@ -145,45 +123,6 @@ add_route_button = pn.widgets.Button(name='Add Route',
                                      button_type='success',
                                      width=100)
 
-number_of_airports = pn.indicators.Number(name='Total airports covered',
-                                          value=General_numbers_df["numbers"].iloc[0],
-                                          format='{value}')
-
-number_of_connections = pn.indicators.Number(name='Total different connections',
-                                             value=General_numbers_df["numbers"].iloc[1],
-                                             format='{value}')
-
-number_of_flights = pn.indicators.Number(name='Total flights per year',
-                                         value=General_numbers_df["numbers"].iloc[2]*365,
-                                         format='{value}')
-
-biggest_airports = pn.pane.DataFrame(top_25_airports_df,
-                                     justify="center",
-                                     sizing_mode="stretch_both",
-                                     max_height=500,
-                                     index=False)
-
-biggest_connections = pn.pane.DataFrame(top_25_connections_df,
-                                        justify="center",
-                                        sizing_mode="stretch_both",
-                                        max_height=500,
-                                        index=False)
-
-continent_or_country = pn.widgets.Select(name='View',
-                                         options=['Continent', 'Country'],
-                                         height=100)
-
-departures = get_unique_departure_countires()
-country_selection = pn.widgets.AutocompleteInput(name='Select country',
-                                                 options=departures,
-                                                 case_sensitive=False,
-                                                 search_strategy='starts_with',
-                                                 placeholder='Write country here',
-                                                 min_characters=1)
-
-# Adding display_icao_codes function to be called when country_selection changes
-country_selection.param.watch(display_icao_codes, 'value')
-
 # Define the callback function to reset the slider's value
 def reset_load_factor(event):
     load_factor.value = 0.8
@@ -211,141 +150,203 @@ def create_route_inputs(route_number):
 
     return icao_departure_input, icao_destination_input
 
-def create_route_df(departure_input, destination_input):
-    df = pd.DataFrame({
+def create_route_df():
+    return pd.DataFrame({
             'Year': list(range(2024, 2051)),
             'Seats': [0.0] * 27,
             'Percentage Change': [0.0] * 27,  # Initialize percentage change column
             'PAX': [0.0] * 27  # Initialize PAX column
         })
 
+#######################################
+# Route View updates ##################
+#######################################
+
+# Input changes are collected and applied together once the inputs have been quiet for a short
+# delay (debounced: every change restarts the timer), so a change set (both codes of a route,
+# a dragged slider, a reset) causes one recomputation and one redraw.
+# A new timeframe or number of legs only re-reads the seats of 2024 from the in-memory seat
+# tensor, a new load factor only recomputes the PAX columns.
+
+# Delay in ms after the last change before the collected changes are applied
+update_delay = 300
+
+def update_route_seats(route_df, departure_value, destination_value):
+    # Seats of 2024 for the selected timeframe and legs
+    value = get_sparse_value(departure_value, destination_value, time_of_year.value, trip_indicator.value)
+
+    route_df['Seats'] = 0.0
+    route_df['Percentage Change'] = 0.0
+    route_df.at[0, 'Seats'] = round(float(value), 2)  # Explicitly cast to float and round to 2 decimal places
+
+    if get_scaling_factors(departure_value):
+        # Compound the seats of all years at once and round to 2 decimal places
+        route_df['Seats'] = forecast_trajectories([route_df.at[0, 'Seats']], [departure_value])[0].round(2)
+
+        # Calculate percentage change
+        prev_seats = route_df['Seats'].shift()[1:]
+        percentage_change = ((route_df['Seats'][1:] - prev_seats) / prev_seats * 100).round(2)
+        route_df.loc[1:, 'Percentage Change'] = percentage_change.where(prev_seats != 0, 0.0)
+
+def update_route_pax(route_df):
+    route_df['PAX'] = (route_df['Seats'] * float(load_factor.value)).round(2)
+
+def route_codes(route_number):
+    departure_input, destination_input = session.route_inputs[route_number - 1]
+    return departure_input.value, destination_input.value
+
+def apply_pending_updates():
+    session.pending_update = None
+    changed_routes, changed_settings = session.pending_routes, session.pending_settings
+    session.pending_routes, session.pending_settings = set(), set()
+
+    # A new timeframe or number of legs changes the seats of every route
+    if 'seats' in changed_settings:
+        changed_routes |= set(session.route_dfs)
+
+    with session.route_map.fig.batch_update():
+        for route_number in sorted(changed_routes):
+            if route_number > len(session.route_inputs):
+                continue  # The route was removed by a reset
+            departure_value, destination_value = route_codes(route_number)
+            departure_input, destination_input = session.route_inputs[route_number - 1]
+
+            # Validate the inputs and move the markers of the route
+            if airport_check.ICAO_check(departure_value):
+                departure_input.css_classes = ["validation-success"]
+                session.route_map.add_airport_marker_departure(departure_value, route_number)
+            else:
+                departure_input.css_classes = ["validation-error"]
+                session.route_map.remove_departure(route_number)
+            if airport_check.ICAO_check(destination_value):
+                destination_input.css_classes = ["validation-success"]
+                session.route_map.add_airport_marker_destination(destination_value, route_number)
+            else:
+                destination_input.css_classes = ["validation-error"]
+                session.route_map.remove_destination(route_number)
+
+            # Forecast the route once both ICAO codes are present
+            if departure_value and destination_value:
+                route_df = session.route_dfs.get(route_number)
+                if route_df is None:
+                    route_df = session.route_dfs[route_number] = create_route_df()
+                update_route_seats(route_df, departure_value, destination_value)
+                update_route_pax(route_df)
+            else:
+                session.route_dfs.pop(route_number, None)
+
+    if 'pax' in changed_settings:
+        for route_number, route_df in session.route_dfs.items():
+            if route_number not in changed_routes:
+                update_route_pax(route_df)
+
+    update_route_outputs()
+
+def schedule_update():
+    if pn.state.curdoc is not None and pn.state.curdoc.session_context is not None:
+        # Restart the timer, the changes are applied update_delay ms after the last one
+        if session.pending_update is not None:
+            session.pending_update.stop()
+        session.pending_update = pn.state.add_periodic_callback(apply_pending_updates, period=update_delay, count=1)
+    else:
+        # No server to run the delayed callback, e.g. when run as a script
+        apply_pending_updates()
+
+def update_route_outputs():
+    routes = sorted(session.route_dfs)
+    session.icao = [code for route_number in routes for code in route_codes(route_number)]
+
+    # Merge all forecasts with seats into final_df, the first route without suffix
+    session.final_df = session.route_dfs.get(1, create_route_df())
+    for route_number in routes:
+        route_df = session.route_dfs[route_number]
+        if route_number > 1 and not route_df.drop(columns='Year').eq(0).all().all():
+            suffixes = ('', f'_{route_number}')
+            session.final_df = pd.merge(session.final_df, route_df, on='Year', how='left', suffixes=suffixes)
+
+    # Redraw the line graph with one trace per route
+    traces = []
+    for count, route_number in enumerate(routes, start=1):
+        departure_value, destination_value = route_codes(route_number)
+        column = 'PAX' if route_number == 1 else f'PAX_{route_number}'
+        if column in session.final_df:
+            name = (f'Connection: {departure_value} - {destination_value}' if len(routes) == 1
+                    else f'Connection {count}: {departure_value} - {destination_value}')
+            traces.append(go.Scatter(x=session.final_df['Year'],
+                                     y=session.final_df[column],
+                                     mode='lines+markers',
+                                     name=name))
+    line_fig.data = []
+    line_fig.add_traces(traces)
+    if len(traces) > 1:
+        line_fig.update_layout(
+            legend=dict(
+                orientation="h",
+                yanchor="middle",
+                y=-0.2,
+                xanchor="center",
+                x=0.5
+            )
+        )
+
+    styled_data = pn.widgets.DataFrame(session.final_df, name='DataFrame', autosize_mode='fit_columns', height=400, width=300)
+    dataframe_pane.object = styled_data
+
+    # Most used aircraft type of every route, looked up in one call
+    route_pairs = [route_codes(route_number) for route_number in routes]
+    session.aircraft_type_df = pd.DataFrame({'Most Used Aircraft Type': most_flown_models(route_pairs)},
+                                            index=[f"{departure}-{destination}" for departure, destination in route_pairs])
+    aircraft_type_df_pane.object = session.aircraft_type_df.style.set_table_styles(
+        [{'selector': 'th', 'props': [('text-align', 'center')]}]
+    ).set_properties(**{'text-align': 'center'})
+
+# Collect the changes of the inputs of a route
+def watch_route_inputs(departure_input, destination_input, route_number):
     @pn.depends(departure_input.param.value, destination_input.param.value, watch=True)
-    def update_seats(departure_input, destination_input):
-        # Set the time_of_year in the forecast_display module
-        global final_df, icao, aircraft_type_df_pane
-
-        # Retrieve current values of other parameters
-        load_factor_value = load_factor.value
-        time_of_year_value = time_of_year.value
-        trip_indicator_value = trip_indicator.value
-
-        forecast_display.set_time_of_year(time_of_year_value)
-        scaling_factors = get_scaling_factors(departure_input)
-        value = get_sparse_value(departure_input, destination_input, time_of_year_value, trip_indicator_value)
-
-        if value is not None:
-            df.at[0, 'Seats'] = round(float(value), 2)  # Explicitly cast to float and round to 2 decimal places
-            df.at[0, 'PAX'] = round(float(value) * float(load_factor_value), 2)  # Explicitly cast to float and round to 2 decimal places
-
-        if scaling_factors:
-            for i in range(1, len(df)):
-                if i < len(scaling_factors):
-                    scaling_factor = scaling_factors[i - 1]
-                else:
-                    scaling_factor = scaling_factors[-1]
-
-                df.at[i, 'Seats'] = round(df.at[i - 1, 'Seats'] * (1 + float(scaling_factor)), 2)  # Explicitly cast to float and round to 2 decimal places
-                df.at[i, 'PAX'] = round(df.at[i, 'Seats'] * float(load_factor_value), 2)  # Explicitly cast to float and round to 2 decimal places
-
-                # Calculate percentage change
-                prev_seats = df.at[i - 1, 'Seats']
-                current_seats = df.at[i, 'Seats']
-                if prev_seats != 0:
-                    percentage_change = ((current_seats - prev_seats) / prev_seats) * 100
-                    df.at[i, 'Percentage Change'] = round(percentage_change, 2)
-                else:
-                    df.at[i, 'Percentage Change'] = 0.0
-
-        if departure_input != "" and destination_input != "":
-            icao.append(departure_input)
-            icao.append(destination_input)
-
-        # Update the aircraft type DataFrame only if both ICAO codes are present
-        if departure_input and destination_input:
-            most_used_model = most_flown_model(departure_input, destination_input)
-            aircraft_type_df.at[f"{departure_input}-{destination_input}", 'Most Used Aircraft Type'] = most_used_model
-            aircraft_type_df_pane.object = aircraft_type_df.style.set_table_styles(
-                [{'selector': 'th', 'props': [('text-align', 'center')]}]
-            ).set_properties(**{'text-align': 'center'})
-
-    return df
+    def route_changed(departure_value, destination_value):
+        session.pending_routes.add(route_number)
+        schedule_update()
+    return route_changed
 
-# Create initial route inputs
-route_inputs = [create_route_inputs(1)]
+@pn.depends(time_of_year.param.value, trip_indicator.param.value, watch=True)
+def seat_settings_changed(time_of_year_value, trip_indicator_value):
+    session.pending_settings.add('seats')
+    schedule_update()
 
-# Create initial dataframe
-initial_departure, initial_destination = route_inputs[0]
-final_df = create_route_df(initial_departure, initial_destination)
+@pn.depends(load_factor.param.value, watch=True)
+def load_factor_changed(load_factor_value):
+    session.pending_settings.add('pax')
+    schedule_update()
 
-icao = []
+# Create initial route inputs
+session.route_inputs = [create_route_inputs(1)]
+session.final_df = create_route_df()
+watch_route_inputs(*session.route_inputs[0], 1)
 
 # Initialize the aircraft type DataFrame
-aircraft_type_df = pd.DataFrame(columns=['Most Used Aircraft Type'])
-aircraft_type_df_pane = pn.pane.DataFrame(aircraft_type_df, width=400)
-
-def initial_update_graph(departure_value, destination_value):
-    global final_df, line_fig, line_graph_pane, dataframe_pane
-    if departure_value and destination_value:  # Ensure both inputs have values
-        # Clear existing traces before adding new ones
-        line_fig.data = []  # Clear existing figure           
-
-        # Add new traces for each PAX column
-        for col in final_df.columns:
-            if col.startswith('PAX'):
-                line_fig.add_trace(go.Scatter(x=final_df['Year'],
-                                              y=final_df['PAX'],
-                                              mode='lines+markers',
-                                              name=f'Connection: {icao[0]} - {icao[1]}'))
-
-        # Update the line graph pane with the updated line_fig
-        line_graph_pane.object = line_fig
-
-        # Update the DataFrame pane with the updated DataFrame
-        styled_data = pn.widgets.DataFrame(final_df, name='DataFrame', autosize_mode='fit_columns', height=400, width=300)
-        dataframe_pane.object = styled_data
-
-        # Update the aircraft type DataFrame only if both ICAO codes are present
-        if departure_value and destination_value:
-            most_used_model = most_flown_model(departure_value, destination_value)
-            aircraft_type_df.at[f"{departure_value}-{destination_value}", 'Most Used Aircraft Type'] = most_used_model
-            aircraft_type_df_pane.object = aircraft_type_df.style.set_table_styles(
-                [{'selector': 'th', 'props': [('text-align', 'center')]}]
-            ).set_properties(**{'text-align': 'center'})
-
-# Use pn.depends to make update_final_df reactive
-pn.depends(initial_departure.param.value, initial_destination.param.value, watch=True)(initial_update_graph)
+aircraft_type_df_pane = pn.pane.DataFrame(session.aircraft_type_df, width=400)
 
 # Define the callback function to reset the inputs and clear the map
 def reset_inputs(event):
-    global route_inputs, final_df, icao, aircraft_type_df
-    # Reset the initial inputs
-    for departure_input, destination_input in route_inputs:
-        departure_input.value = ''
-        destination_input.value = ''
     # Reset the map and the dataframe
-    reset_map()
-    icao = []
-    final_df = pd.DataFrame({
-        'Year': list(range(2024, 2051)),
-        'Seats': [0] * 27,
-        'Percentage Change': [0.0] * 27,  # Initialize percentage change column
-        'PAX': [0] * 27  # Initialize PAX column
-    })
-    styled_data = pn.widgets.DataFrame(final_df, name='DataFrame', autosize_mode='fit_columns', height=400, width=300)
+    session.route_map.reset_map()
+    session.route_dfs = {}
+    session.pending_routes = set()
+    session.icao = []
+    session.final_df = create_route_df()
+    styled_data = pn.widgets.DataFrame(session.final_df, name='DataFrame', autosize_mode='fit_columns', height=400, width=300)
     dataframe_pane.object = styled_data
-    line_graph_pane.object = px.line(final_df, x='Year', y='PAX', markers=True)
+    # Clear the line graph in place, update_route_outputs keeps drawing into line_fig
+    line_fig.data = []
+    line_fig.add_traces(px.line(session.final_df, x='Year', y='PAX', markers=True).data)
     # Keep only the initial route input fields
-    route_inputs = [create_route_inputs(1)]
-    route_input_column[:] = [pn.Row(*route_inputs[0])]
-
-    add_validation_callbacks(*route_inputs[0])
-    initial_departure, initial_destination = route_inputs[0]
-    final_df = create_route_df(initial_departure, initial_destination)
-    pn.depends(initial_departure.param.value, initial_destination.param.value, watch=True)(initial_update_graph)
+    session.route_inputs = [create_route_inputs(1)]
+    route_input_column[:] = [pn.Row(*session.route_inputs[0])]
+    watch_route_inputs(*session.route_inputs[0], 1)
 
     # Reset the aircraft type DataFrame
-    aircraft_type_df = pd.DataFrame(columns=['Most Used Aircraft Type'])
-    aircraft_type_df_pane.object = aircraft_type_df.style.set_table_styles(
+    session.aircraft_type_df = pd.DataFrame(columns=['Most Used Aircraft Type'])
+    aircraft_type_df_pane.object = session.aircraft_type_df.style.set_table_styles(
         [{'selector': 'th', 'props': [('text-align', 'center')]}]
     ).set_properties(**{'text-align': 'center'})
 
@@ -353,117 +354,20 @@ reset_button.on_click(reset_inputs)
 
 # Function to add new route inputs
 def add_route(event):
-    global route_input, final_df, line_graph_pane, line_fig, aircraft_type_df, aircraft_type_df_pane
-    route_number = len(route_inputs) + 1
+    route_number = len(session.route_inputs) + 1
     new_departure_input, new_destination_input = create_route_inputs(route_number)
-    route_inputs.append((new_departure_input, new_destination_input))
+    session.route_inputs.append((new_departure_input, new_destination_input))
 
     route_input_column.append(pn.Row(new_departure_input, new_destination_input))
-    add_validation_callbacks(new_departure_input, new_destination_input)
-    new_df = create_route_df(new_departure_input, new_destination_input)
-    # Define the function to merge new_df into final_df
-    def update_final_df(dep_value, dest_value):
-        global final_df, icao
-        if dep_value and dest_value:  # Ensure both inputs have values
-            if not new_df.drop(columns='Year').eq(0).all().all():
-                suffixes = ('', f'_{route_number}')
-                final_df = pd.merge(final_df, new_df, on='Year', how='left', suffixes=suffixes)
-                
-                line_fig.data = [] 
-                count = 0
-                count_1 = 1
-                for col in final_df.columns:
-                    if col.startswith('PAX'):
-                        line_fig.add_trace(go.Scatter(
-                            x=final_df['Year'], 
-                            y=final_df[col],
-                            mode='lines+markers', 
-                            name=f'Connection {count_1}: {icao[count]} - {icao[count+1]}'
-                        ))
-                        count += 2
-                        count_1 += 1
-                
-                line_fig.update_layout(
-                    legend=dict(
-                        orientation="h",  
-                        yanchor="middle",  
-                        y=-0.2,  
-                        xanchor="center",  
-                        x=0.5  
-                    )
-                )
-                
-                styled_data = pn.widgets.DataFrame(final_df, name='DataFrame', autosize_mode='fit_columns', height=400, width=300)
-                dataframe_pane.object = styled_data
-
-                # Update the aircraft type DataFrame only if both ICAO codes are present
-                if dep_value and dest_value:
-                    most_used_model = most_flown_model(dep_value, dest_value)
-                    aircraft_type_df.at[f"{dep_value}-{dest_value}", 'Most Used Aircraft Type'] = most_used_model
-                    aircraft_type_df_pane.object = aircraft_type_df.style.set_table_styles(
-                        [{'selector': 'th', 'props': [('text-align', 'center')]}]
-                    ).set_properties(**{'text-align': 'center'})
-
-    pn.depends(new_departure_input.param.value, new_destination_input.param.value, watch=True)(update_final_df)
+    watch_route_inputs(new_departure_input, new_destination_input, route_number)
 
 add_route_button.on_click(add_route)
 
-# Callback to validate and update departure marker on input change
-def create_validate_departure_callback(departure_input):
-    @pn.depends(departure_input.param.value, watch=True)
-    def validate_departure(value):
-        if airport_check.ICAO_check(value):
-            departure_input.css_classes = ["validation-success"]
-            add_airport_marker_departure(value)
-        else:
-            departure_input.css_classes = ["validation-error"]
-    return validate_departure
-
-# Callback to validate and update destination marker on input change
-def create_validate_destination_callback(destination_input):
-    @pn.depends(destination_input.param.value, watch=True)
-    def validate_destination(value):
-        if airport_check.ICAO_check(value):
-            destination_input.css_classes = ["validation-success"]
-            add_airport_marker_destination(value)
-        else:
-            destination_input.css_classes = ["validation-error"]
-    return validate_destination
-
-# Function to add validation callbacks for a route
-def add_validation_callbacks(departure_input, destination_input):
-    create_validate_departure_callback(departure_input)
-    create_validate_destination_callback(destination_input)
-
-# Add validation callbacks for the initial route
-add_validation_callbacks(*route_inputs[0])
-
 # Initialize route_input_column as an empty pn.Column
 route_input_column = pn.Column()
-route_input_column[:] = [pn.Row(*route_inputs[0])]
-
-create_continent_map()
-@pn.depends(continent_or_country.param.value, watch=True)
-def count_or_con(value):
-    if value == 'Continent':
-        create_continent_map()
-    else: 
-        create_country_map()
-
-@pn.depends(country_selection.param.value, watch=True)
-def country_view(value):
-    add_flight_routes(value)
-
-fig2 = create_connections()
-pie_chart_1 = create_pie_chart_continent()
-pie_chart_2 = create_pie_chart_country()
-
-map_pane = pn.pane.Plotly(fig, css_classes=['panel-column'])
-map_pane2 = pn.pane.Plotly(fig2, css_classes=['panel-column'])
-comparison_map = pn.pane.Plotly(comparison_map, css_classes=['panel-column'])
-country_map = pn.pane.Plotly(country_map, css_classes=['panel-column'])
-pie_pane = pn.pane.Plotly(pie_chart_1)
-pie_pane2 = pn.pane.Plotly(pie_chart_2)
+route_input_column[:] = [pn.Row(*session.route_inputs[0])]
+
+map_pane = pn.pane.Plotly(session.route_map.fig, css_classes=['panel-column'])
 
 # Create a column for the slider and button
 load_factor_column = pn.Column(load_factor, reset_button_LF, sizing_mode='stretch_width')
@@ -506,9 +410,8 @@ def update_country_comparison_pane(initial_departing_pax, matching_icao_codes):
     # Convert scaling factors to percentages
     scaling_factors_percent = [f"{factor * 200}%" for factor in scaling_factors]
 
-    for i in range(1, len(years)):
-        next_pax = departing_pax[-1] * (1 + float(scaling_factors[i - 1])*2)
-        departing_pax.append(round(next_pax, 2))
+    # Compound the departing PAX of all years at once with twice the GDP growth
+    departing_pax += forecast_trajectories(departing_pax, matching_icao_codes[:1], growth_multiplier=2)[0][1:].round(2).tolist()
 
     country_df = pd.DataFrame({
         'Year': years,
@@ -528,30 +431,152 @@ def update_country_comparison_pane(initial_departing_pax, matching_icao_codes):
     pages["Country Comparison"][7:10, 0:5] = dataframe_pane_country
     pages["Country Comparison"][7:10, 5:10] = line_graph_pane_country
 
-def show(page):
-    if page == "World View":
-        pages[page][0:2, 0:10] = pn.Column(
-            "<h1><u>General Numbers</u></h1>",
-            pn.Row(
-                pn.Column(number_of_airports, sizing_mode='stretch_width'),
-                pn.Column(number_of_connections, sizing_mode='stretch_width'),
-                pn.Column(number_of_flights, sizing_mode='stretch_width')
-            )
+#######################################
+# Lazy page initialisation ############
+#######################################
+
+# The data and figures of the World View, Country View and Country Comparison pages are only
+# loaded when a page is first opened. Page modules are imported once per process, and figures
+# that are not changed by callbacks are kept in pn.state.cache, so they are shared by all sessions.
+# A cached figure is rebuilt when the source files of its data change, see data_service.source_key.
+
+
+def shared_figure(name, create, *datasets):
+    """Return the figure of create() shared by all sessions, rebuilt after the data of datasets changed."""
+    key = data_service.source_key(*datasets)
+    cached = pn.state.cache.get(name)
+    if cached is None or cached[0] != key:
+        cached = pn.state.cache[name] = (key, create())
+    return cached[1]
+
+
+def build_world_view():
+    import General_numbers
+    from world_view import create_connections
+
+    # Derive the general numbers again if the flight data changed
+    General_numbers.prepare_data()
+
+    number_of_airports = pn.indicators.Number(name='Total airports covered',
+                                              value=General_numbers.General_numbers_df["numbers"].iloc[0],
+                                              format='{value}')
+
+    number_of_connections = pn.indicators.Number(name='Total different connections',
+                                                 value=General_numbers.General_numbers_df["numbers"].iloc[1],
+                                                 format='{value}')
+
+    number_of_flights = pn.indicators.Number(name='Total flights per year',
+                                             value=General_numbers.General_numbers_df["numbers"].iloc[2]*365,
+                                             format='{value}')
+
+    biggest_airports = pn.pane.DataFrame(General_numbers.top_25_airports_df,
+                                         justify="center",
+                                         sizing_mode="stretch_both",
+                                         max_height=500,
+                                         index=False)
+
+    biggest_connections = pn.pane.DataFrame(General_numbers.top_25_connections_df,
+                                            justify="center",
+                                            sizing_mode="stretch_both",
+                                            max_height=500,
+                                            index=False)
+
+    map_pane2 = pn.pane.Plotly(shared_figure('world_view_connections', create_connections,
+                                             ("flight_connections", "Year")),
+                               css_classes=['panel-column'])
+
+    pages["World View"][0:2, 0:10] = pn.Column(
+        "<h1><u>General Numbers</u></h1>",
+        pn.Row(
+            pn.Column(number_of_airports, sizing_mode='stretch_width'),
+            pn.Column(number_of_connections, sizing_mode='stretch_width'),
+            pn.Column(number_of_flights, sizing_mode='stretch_width')
         )
-        pages[page][2:9, 0:10] = map_pane2
-        pages[page][9:13, 0:5] = pn.Column("<h2><u>List of busiest airports by departing flights</u></h2>", biggest_airports)
-        pages[page][9:13, 5:10] = pn.Column("<h2><u> List of busiest flight routes</u></h2>", biggest_connections)
-    elif page == "Country View":
-        pages[page][0:1, 0:1] = continent_or_country
-        pages[page][1:7, 0:10] = country_map
-        pages[page][7:13, 0:5] = pie_pane
-        pages[page][7:13, 5:10] = pie_pane2
-    elif page == "Country Comparison":
-        pages[page][0:1, 0:2] = country_selection
-        pages[page][1:2, 0:2] = pn.Spacer()  # Placeholder for future elements
-        pages[page][2:7, 0:10] = comparison_map
-        pages[page][7:10, 0:10] = pn.Spacer()
-        pages[page][10:13, 0:10] = pn.Spacer()
+    )
+    pages["World View"][2:9, 0:10] = map_pane2
+    pages["World View"][9:13, 0:5] = pn.Column("<h2><u>List of busiest airports by departing flights</u></h2>", biggest_airports)
+    pages["World View"][9:13, 5:10] = pn.Column("<h2><u> List of busiest flight routes</u></h2>", biggest_connections)
+
+
+def build_country_view():
+    import country_view
+    from country_view import create_country_map, create_continent_map, country_map, create_pie_chart_continent, create_pie_chart_country
+
+    # Derive the country frames again if the flight or airport data changed
+    country_view.prepare_data()
+    # Every session draws on its own copy of the blank map
+    country_figure = go.Figure(country_map)
+
+    continent_or_country = pn.widgets.Select(name='View',
+                                             options=['Continent', 'Country'],
+                                             height=100)
+
+    create_continent_map(country_figure)
+    @pn.depends(continent_or_country.param.value, watch=True)
+    def count_or_con(value):
+        if value == 'Continent':
+            create_continent_map(country_figure)
+        else:
+            create_country_map(country_figure)
+
+    country_data = (("flight_connections", "Year"), "airports")
+    pie_pane = pn.pane.Plotly(shared_figure('country_view_pie_chart_continent', create_pie_chart_continent, *country_data))
+    pie_pane2 = pn.pane.Plotly(shared_figure('country_view_pie_chart_country', create_pie_chart_country, *country_data))
+
+    pages["Country View"][0:1, 0:1] = continent_or_country
+    pages["Country View"][1:7, 0:10] = pn.pane.Plotly(country_figure, css_classes=['panel-column'])
+    pages["Country View"][7:13, 0:5] = pie_pane
+    pages["Country View"][7:13, 5:10] = pie_pane2
+
+
+def build_country_comparison():
+    global comparison_map
+    import country_comparison
+    from country_comparison import comparison_map as blank_comparison_map, get_unique_departure_countires, add_flight_routes
+
+    # Derive the country flows again if the flight data changed
+    country_comparison.prepare_data()
+
+    # Every session draws on its own copy of the blank map
+    comparison_figure = go.Figure(blank_comparison_map)
+
+    departures = get_unique_departure_countires()
+    country_selection = pn.widgets.AutocompleteInput(name='Select country',
+                                                     options=departures,
+                                                     case_sensitive=False,
+                                                     search_strategy='starts_with',
+                                                     placeholder='Write country here',
+                                                     min_characters=1)
+
+    # Adding display_icao_codes function to be called when country_selection changes
+    country_selection.param.watch(display_icao_codes, 'value')
+
+    @pn.depends(country_selection.param.value, watch=True)
+    def country_view(value):
+        add_flight_routes(value, comparison_figure)
+
+    comparison_map = pn.pane.Plotly(comparison_figure, css_classes=['panel-column'])
+
+    pages["Country Comparison"][0:1, 0:2] = country_selection
+    pages["Country Comparison"][1:2, 0:2] = pn.Spacer()  # Placeholder for future elements
+    pages["Country Comparison"][2:7, 0:10] = comparison_map
+    pages["Country Comparison"][7:10, 0:10] = pn.Spacer()
+    pages["Country Comparison"][10:13, 0:10] = pn.Spacer()
+
+
+page_builders = {
+    "World View": build_world_view,
+    "Country View": build_country_view,
+    "Country Comparison": build_country_comparison,
+}
+built_pages = set()
+
+
+def show(page):
+    # Build the page the first time it is shown in this session
+    if page in page_builders and page not in built_pages:
+        page_builders[page]()
+        built_pages.add(page)
     return pages[page]
 
 starting_page = pn.state.session_args.get("page", [b"World View"])[0].decode()
@@ -566,7 +591,8 @@ page = pn.widgets.RadioButtonGroup(
 
 page.css_classes = ['vertical-radio-buttons']
 
-ishow = pn.bind(show, page=page)
+# Show a loading indicator while a page is built
+ishow = pn.panel(pn.bind(show, page=page), defer_load=True, loading_indicator=True)
 pn.state.location.sync(page, {"value": "page"})
 
 sidebar = pn.Column()
@@ -0,0 +1,189 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+import pandas as pd
+
+#######################################
+# PATHS ###############################
+#######################################
+
+# Ensure the correct module path is added
+current_directory = Path(__file__).resolve().parent
+api_aerodatabox_path = current_directory.parents[0] / 'api_aerodatabox'
+sys.path.insert(0, str(api_aerodatabox_path))
+
+import data_preperation
+import data_transformation_pandas
+from airport_registry import load_airport_registry
+
+connection_data = api_aerodatabox_path / "connection_data"
+airport_data = api_aerodatabox_path / "airport_data"
+panel_data = current_directory / "data"
+
+
+#######################################
+# Shared data cache ###################
+#######################################
+
+"""
+    Process-wide cache of the data shared by the dashboard pages.
+
+    Every dataset is loaded once per process and reused by all view modules
+    and sessions. Each cache entry is keyed by the modification time and
+    size of its source files (for a directory, of the files in it), so
+    regenerated data (e.g. a new flight_connections_Year.json or an edited
+    airport detail file) is picked up on the next request without
+    restarting the server.
+
+    Callers receive shallow copies: adding, renaming or dropping columns
+    does not affect the cached frames. The frames must not be modified in
+    place.
+"""
+
+_cache = {}
+_lock = threading.RLock()
+
+
+def _source_key(paths):
+    """
+    Return the (mtime, size) of every source path, None for missing ones.
+
+    A directory is keyed on the files it contains: their number, the latest
+    modification time and the total size, so added, removed and edited
+    files are all noticed.
+    """
+    key = []
+    for path in paths:
+        try:
+            if path.is_dir():
+                stats = [entry.stat() for entry in os.scandir(path) if entry.is_file()]
+                key.append((len(stats),
+                            max((stat.st_mtime_ns for stat in stats), default=0),
+                            sum(stat.st_size for stat in stats)))
+            else:
+                stat = path.stat()
+                key.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            key.append(None)
+    return tuple(key)
+
+
+def _cached(name, paths, load):
+    """Return the cached result of load(), reloading it when the source files changed."""
+    key = _source_key(paths)
+    with _lock:
+        entry = _cache.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key, load())
+            _cache[name] = entry
+    return entry[1]
+
+
+def _sources(dataset):
+    """Return the source paths of a dataset, e.g. ("flight_connections", "Year") or "airports"."""
+    if isinstance(dataset, tuple) and dataset[0] == "flight_connections":
+        return [connection_data / f"flight_connections_{dataset[1]}.json"]
+    if dataset in ("airports", "airport_registry"):
+        return [airport_data / "Available_Airports.json", airport_data / "airports_detail_data"]
+    if dataset == "country_coordinates":
+        return [panel_data / "country-coord.csv"]
+    if dataset == "yearly_seats_per_airport":
+        return [panel_data / "yearly_seats_per_airport.json"]
+    raise ValueError(f"Unknown dataset: {dataset}")
+
+
+def source_key(*datasets):
+    """
+    Get a key of the source files of datasets, e.g. for caching results derived from them.
+
+    Args:
+        datasets: Dataset names as used by the cache, e.g. ("flight_connections", "Year"), "airports".
+
+    Returns:
+        tuple: The (mtime, size) keys of the source files; it changes whenever a source file does.
+    """
+    return tuple(_source_key(_sources(dataset)) for dataset in datasets)
+
+
+def flight_connections(month="Year"):
+    """
+    Get the connection frames of a month, see data_transformation_pandas.process_flight_connections.
+
+    Args:
+        month (str): The month, e.g. "01-January", or "Year" for the whole year.
+
+    Returns:
+        tuple: Shallow copies of (flight_data_df, daily_flights_df).
+    """
+    frames = _cached(("flight_connections", month), _sources(("flight_connections", month)),
+                     lambda: data_transformation_pandas.process_flight_connections(month))
+    return tuple(frame.copy(deep=False) for frame in frames)
+
+
+def airports():
+    """
+    Get the details of all available airports, see data_preperation.prepare_airport_data.
+
+    Returns:
+        gpd.GeoDataFrame: A shallow copy of the airport data, None if it could not be read.
+    """
+    airport_df = _cached("airports", _sources("airports"), data_preperation.prepare_airport_data)
+    return None if airport_df is None else airport_df.copy(deep=False)
+
+
+def airport_registry(refresh=True):
+    """
+    Get the registry of available airports with their locations, see airport_registry.AirportRegistry.
+
+    Args:
+        refresh (bool): Whether to check the source files for changes first. With False, an
+                        already loaded registry is returned without any I/O; call clear() to
+                        pick up new airport data.
+
+    Returns:
+        AirportRegistry: The shared registry; it is not modified by its methods.
+    """
+    if not refresh:
+        entry = _cache.get("airport_registry")
+        if entry is not None:
+            return entry[1]
+
+    return _cached("airport_registry", _sources("airport_registry"),
+                   lambda: load_airport_registry(airport_data / "Available_Airports.json", airports()))
+
+
+def country_coordinates():
+    """
+    Get the country names, codes and average coordinates of country-coord.csv.
+
+    Returns:
+        pd.DataFrame: A shallow copy of the table, indexed by country name.
+    """
+    return _cached("country_coordinates", _sources("country_coordinates"),
+                   lambda: pd.read_csv(panel_data / "country-coord.csv", index_col=0)).copy(deep=False)
+
+
+def yearly_seats_per_airport():
+    """
+    Get the yearly departing seats of every airport.
+
+    Returns:
+        dict: The shared ICAO code -> seats mapping; it must not be modified.
+    """
+    def load():
+        with open(panel_data / "yearly_seats_per_airport.json") as json_file:
+            return json.load(json_file)
+
+    return _cached("yearly_seats_per_airport", _sources("yearly_seats_per_airport"), load)
+
+
+def clear():
+    """Drop all cached data."""
+    with _lock:
+        _cache.clear()
@@ -5,19 +5,21 @@
 
 import numpy as np
 import pandas as pd
-import scipy.sparse
-import json
+from itertools import takewhile
 from pathlib import Path
 
+from countries import country_of
+from forecast_engine import forecast_years, growth_rates
+from model_store import load_model_store
+from seat_tensor import load_seat_tensor
+
 
 #######################################
 # Paths ###############################
 #######################################
 
 current_directory = Path(__file__).resolve().parent
-country_codes_path = current_directory / "data" / "CountryCodes.json"
 GDP_path = current_directory / "data" / "GDPData.csv"
-matrix_csv_path = current_directory / "data" / "model_matrix.csv"
 
 
 #######################################
@@ -25,14 +27,21 @@ matrix_csv_path = current_directory / "data" / "model_matrix.csv"
 #######################################
 
 
-# Load the country codes from JSON file
-with open(country_codes_path, 'r') as file:
-    country_codes = json.load(file)
-
 # Load the GDP data
 gdp_data = pd.read_csv(GDP_path)
 
-time_of_year = 'January'
+# The years from 2024 on with GDP growth rates (forecast years: see forecast_engine)
+gdp_years = list(takewhile(lambda year: str(year) in gdp_data.columns, forecast_years))
+
+# GDP growth rates as fractions in a countries x years array, with the row of every country
+gdp_growth = gdp_data[[str(year) for year in gdp_years]].to_numpy(dtype=float) / 100
+gdp_row = {country: i for i, country in enumerate(gdp_data['Country'].tolist())}
+
+# Load the monthly seat matrices aligned onto one airport index (rebuilt if outdated)
+seat_tensor = load_seat_tensor()
+
+# Load the integer-coded most flown aircraft models (rebuilt if outdated)
+model_store = load_model_store()
 
 # Create a DataFrame for the additional data
 df = pd.DataFrame({
@@ -48,51 +57,54 @@ df = pd.DataFrame({
 #######################################
 
 
-def set_time_of_year(time_of_year_value):
+# Function to get the scaling factors from GDP data based on departure ICAO code
+def get_scaling_factors(departure_code):
     """
-    Set the global variable time_of_year to the specified value.
+    Get the GDP growth rate scaling factors from GDP data based on the departure ICAO code.
 
     Args:
-        time_of_year_value (str): The time of year to be set.
+        departure_code (str): The ICAO code of the departure airport.
+
+    Returns:
+        list: A list of scaling factors for the specified departure code.
     """
-    global time_of_year
-    time_of_year = time_of_year_value
+    row = gdp_row.get(country_of(departure_code))
+    if row is None:
+        return []
 
+    # GDP growth rates from 2024 until 2050 or until there is no column anymore
+    return gdp_growth[row].tolist()
 
-# Function to get the scaling factors from GDP data based on departure ICAO code
-def get_scaling_factors(departure_code):
+
+def get_growth_rates(departure_codes):
     """
-    Get the GDP growth rate scaling factors from GDP data based on the departure ICAO code.
+    Get the yearly GDP growth rates of many departure airports for the forecast years.
 
     Args:
-        departure_code (str): The ICAO code of the departure airport.
+        departure_codes (list): ICAO codes of the departure airports.
 
     Returns:
-        list: A list of scaling factors for the specified departure code.
+        np.ndarray: See forecast_engine.growth_rates.
     """
-    scaling_factors = []
-    if departure_code.startswith('K'):
-        country_code = "USA"
-    else:
-        first_two_letters = departure_code[:2]
-        country_code = country_codes.get(first_two_letters)
-    if country_code is None:
-        return scaling_factors
-
-    # Find the row corresponding to the country code in GDPData.csv
-    country_row = gdp_data[gdp_data['Country'] == country_code]
-    if country_row.empty:
-        return scaling_factors
-
-    # Starting from 2024, get the GDP growth rate until 2050 or until there is not a number anymore
-    for year in range(2024, 2051):
-        column_name = str(year)
-        if column_name in country_row.columns:
-            scaling_factors.append(country_row[column_name].values[0] / 100)  # Divide by 100 to get as a percentage
-        else:
-            break
-
-    return scaling_factors
+    return growth_rates(gdp_data, departure_codes)
+
+
+def forecast_trajectories(initial_values, departure_codes, growth_multiplier=1):
+    """
+    Forecast values of many routes or countries for all forecast years with a cumulative product.
+
+    Args:
+        initial_values (list): Values (e.g., seats) of 2024, one per route.
+        departure_codes (list): ICAO codes of the departure airports, whose country's GDP growth
+                                drives the forecast.
+        growth_multiplier (float): Factor applied to the GDP growth rates.
+
+    Returns:
+        np.ndarray: Array of shape (routes, forecast years); NaN for routes without GDP data.
+    """
+    growth = np.cumprod(1 + growth_multiplier * get_growth_rates(departure_codes), axis=1)
+    initial_values = np.asarray(initial_values, dtype=float)[:, np.newaxis]
+    return np.hstack([initial_values, initial_values * growth])
 
 
 # Function to get the value from the sparse matrix
@@ -109,58 +121,16 @@ def get_sparse_value(departure_code, destination_code, time_of_year_value, trip_
     Returns:
         int: The value from the sparse matrix for the specified parameters.
     """
-    def get_value_for_route(departure_code, destination_code, time_of_year_value):
-        """
-        Get the value for a specific route and time of year from the sparse matrix.
-
-        Args:
-            departure_code (str): The ICAO code of the departure airport.
-            destination_code (str): The ICAO code of the destination airport.
-            time_of_year_value (str): The time of year (e.g., "January", "Whole year").
-
-        Returns:
-            int: The value from the sparse matrix for the specified route and time of year.
-        """
-        if time_of_year_value == "Whole year":
-            total_value = 0
-            months = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
-            for month in months:
-                sparse_matrix = scipy.sparse.load_npz(f'data/seat_matrices/{month}.npz')
-                labels = np.load(f'data/seat_matrices/{month}_labels.npz', allow_pickle=True)
-                row_labels = labels['rows']
-                col_labels = labels['cols']
-                try:
-                    departure_idx = np.where(row_labels == departure_code)[0][0]
-                    destination_idx = np.where(col_labels == destination_code)[0][0]
-                    total_value += sparse_matrix[departure_idx, destination_idx] * 30
-                except IndexError:
-                    continue  # Skip if index not found for the month
-            return total_value
-        else:
-            # Load the sparse matrix and labels for the specified time_of_year_value
-            sparse_matrix = scipy.sparse.load_npz(f'data/seat_matrices/{time_of_year_value}.npz')
-            labels = np.load(f'data/seat_matrices/{time_of_year_value}_labels.npz', allow_pickle=True)
-            row_labels = labels['rows']
-            col_labels = labels['cols']
-            try:
-                departure_idx = np.where(row_labels == departure_code)[0][0]
-                destination_idx = np.where(col_labels == destination_code)[0][0]
-                return sparse_matrix[departure_idx, destination_idx]
-            except IndexError:
-                return 0
-
     if trip_indicator_value == "One-way":
-        return get_value_for_route(departure_code, destination_code, time_of_year_value)
+        return seat_tensor.value(departure_code, destination_code, time_of_year_value)
     elif trip_indicator_value == "Round-trip":
-        one_way_value = get_value_for_route(departure_code, destination_code, time_of_year_value)
-        return_trip_value = get_value_for_route(destination_code, departure_code, time_of_year_value)
-        return one_way_value + return_trip_value
+        return seat_tensor.value(departure_code, destination_code, time_of_year_value, round_trip=True)
 
 
-# Function to get the most flown model from the model matrix CSV file
+# Function to get the most flown model from the model store
 def most_flown_model(departure_code, destination_code):
     """
-    Get the most flown aircraft model for the specified route from the CSV matrix.
+    Get the most flown aircraft model for the specified route from the model store.
 
     Args:
         departure_code (str): The ICAO code of the departure airport.
@@ -169,12 +139,17 @@ def most_flown_model(departure_code, destination_code):
     Returns:
         str: The most flown aircraft model for the specified route.
     """
-    # Load the matrix CSV file into a DataFrame
-    model_matrix_df = pd.read_csv(matrix_csv_path, index_col=0)
-
-    try:
-        # Look up the value in the DataFrame
-        most_flown_model = model_matrix_df.loc[departure_code, destination_code]
-        return most_flown_model
-    except KeyError:
-        return "No aircraft data for this route"
\ No newline at end of file
+    return model_store.model(departure_code, destination_code)
+
+
+def most_flown_models(routes):
+    """
+    Get the most flown aircraft models for many routes at once.
+
+    Args:
+        routes (list): (departure ICAO code, destination ICAO code) pairs.
+
+    Returns:
+        list: The most flown aircraft model for every route.
+    """
+    return model_store.models(routes)
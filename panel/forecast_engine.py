@@ -0,0 +1,131 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+import sys
+from itertools import takewhile
+from pathlib import Path
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+from countries import countries_of
+from seat_tensor import load_seat_tensor
+
+
+#######################################
+# Paths ###############################
+#######################################
+
+current_directory = Path(__file__).resolve().parent
+GDP_path = current_directory / "data" / "GDPData.csv"
+network_forecast_path = current_directory / "data" / "network_forecast.parquet"
+
+forecast_years = list(range(2024, 2051))
+
+
+#######################################
+# Network forecast ####################
+#######################################
+
+"""
+    Forecasts the seats and passengers of every origin-destination pair of
+    the seat tensor for all forecast years in one vectorized run, with the
+    same GDP-driven growth as the Route View: the seats of 2024 grow with
+    the GDP growth rates of the departure country. The seat matrix and the
+    GDP table are passed in, so the engine loads no data of its own.
+
+    Usage: python forecast_engine.py [load factor] [timeframe]
+           exports the forecast to data/network_forecast.parquet
+           (defaults: 0.8 and "Whole year").
+"""
+
+
+class NetworkForecast(NamedTuple):
+    """
+    Seats and passengers of many routes for all forecast years.
+
+    Row i of seats and pax belongs to the route departures[i] -> destinations[i]; routes
+    whose departure country has no GDP data are NaN after 2024.
+    """
+    departures: np.ndarray
+    destinations: np.ndarray
+    years: np.ndarray
+    seats: np.ndarray
+    pax: np.ndarray
+
+    def to_frame(self):
+        """Return the forecast as a long DataFrame with one row per route and year."""
+        routes, years = self.seats.shape
+        return pd.DataFrame({
+            'Departure': np.repeat(self.departures, years),
+            'Destination': np.repeat(self.destinations, years),
+            'Year': np.tile(self.years, routes),
+            'Seats': self.seats.ravel(),
+            'PAX': self.pax.ravel(),
+        })
+
+    def to_parquet(self, path=network_forecast_path):
+        """Export the forecast to a Parquet file, see to_frame."""
+        self.to_frame().to_parquet(path, index=False)
+
+
+def growth_rates(gdp_data, departure_codes):
+    """
+    Get the yearly GDP growth rates of many departure airports for the forecast years.
+
+    Args:
+        gdp_data (pd.DataFrame): GDP growth in percent, with a 'Country' column (Alpha-3 codes)
+                                 and one column per year as in data/GDPData.csv.
+        departure_codes (array-like): ICAO codes of the departure airports.
+
+    Returns:
+        np.ndarray: Array of shape (airports, forecast years - 1) holding the growth rate applied from
+                    one forecast year to the next; the last available rate is used for later years.
+                    Rows of airports without GDP data are NaN, as is the whole array if the table
+                    has no forecast years.
+    """
+    gdp_years = list(takewhile(lambda year: str(year) in gdp_data.columns, forecast_years))
+    if not gdp_years:
+        return np.full((len(departure_codes), len(forecast_years) - 1), np.nan)
+    gdp_growth = gdp_data[[str(year) for year in gdp_years]].to_numpy(dtype=float) / 100
+    gdp_row = {country: i for i, country in enumerate(gdp_data['Country'].tolist())}
+
+    rows = pd.Series(countries_of(departure_codes), dtype=object).map(gdp_row).fillna(-1).to_numpy(dtype=np.int64)
+    rate_years = np.minimum(np.arange(len(forecast_years) - 1), len(gdp_years) - 1)
+    rates = gdp_growth[rows][:, rate_years]
+    rates[rows < 0] = np.nan
+    return rates
+
+
+def forecast_network(matrix, codes, gdp_data, load_factor=0.8):
+    """
+    Forecast all origin-destination pairs with seats.
+
+    Args:
+        matrix (scipy.sparse matrix): Seats of 2024 from row airport to column airport,
+                                      e.g. seat_tensor.SeatTensor.matrix.
+        codes (np.ndarray): ICAO codes of the rows and columns of matrix.
+        gdp_data (pd.DataFrame): GDP growth table, see growth_rates.
+        load_factor (float): Share of the seats taken by passengers.
+
+    Returns:
+        NetworkForecast: Seats and PAX of every route for all forecast years.
+    """
+    matrix = matrix.tocoo()
+    departures = codes[matrix.row]
+    growth = np.cumprod(1 + growth_rates(gdp_data, departures), axis=1)
+    initial_seats = np.asarray(matrix.data, dtype=float)[:, np.newaxis]
+    seats = np.hstack([initial_seats, initial_seats * growth])
+    return NetworkForecast(departures, codes[matrix.col], np.array(forecast_years),
+                           seats, seats * load_factor)
+
+
+if __name__ == "__main__":
+    load_factor = float(sys.argv[1]) if len(sys.argv) > 1 else 0.8
+    time_of_year_value = sys.argv[2] if len(sys.argv) > 2 else "Whole year"
+    seat_tensor = load_seat_tensor()
+    network_forecast = forecast_network(seat_tensor.matrix(time_of_year_value), seat_tensor.codes,
+                                        pd.read_csv(GDP_path), load_factor)
+    network_forecast.to_parquet()
+    print(f"Saved the forecast of {len(network_forecast.departures)} routes to {network_forecast_path}")
@@ -0,0 +1,155 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+import sys
+import zlib
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import scipy.sparse
+
+#######################################
+# PATHS ###############################
+#######################################
+
+# Ensure the correct module path is added
+current_directory = Path(__file__).resolve().parent
+api_aerodatabox_path = current_directory.parents[0] / 'api_aerodatabox'
+sys.path.insert(0, str(api_aerodatabox_path))
+
+from airport_index import load_labeled_matrix, replace_atomically, save_labeled_matrix
+
+matrix_csv_path = current_directory / "data" / "model_matrix.csv"
+model_store_path = current_directory / "data" / "model_store"
+model_names_path = current_directory / "data" / "model_store_names.npz"
+
+no_data = "No aircraft data for this route"
+
+
+#######################################
+# Aircraft model store ################
+#######################################
+
+"""
+    data/model_matrix.csv holds the most flown aircraft models of every
+    route as text, one row per departure and one column per destination.
+    The model store keeps the same table integer-coded: a sparse matrix
+    with the model ID + 1 of every route (0 for routes without data) in
+    data/model_store.npz with its labels, and the table of model names in
+    data/model_store_names.npz.
+
+    The store is only saved by running this module. Loading never writes to
+    the data folder: if the CSV is newer, or the saved files do not belong
+    together, the store is built from the CSV in memory. The names file
+    records the shape and a checksum of the matrix it was saved with, so a
+    matrix and names table from different builds are never combined.
+
+    Usage: python model_store.py rebuilds the store from the CSV.
+"""
+
+
+def build_model_store():
+    """
+    Integer-code the aircraft models of data/model_matrix.csv.
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix of model IDs + 1, row ICAO codes, column ICAO codes, model names).
+    """
+    model_matrix_df = pd.read_csv(matrix_csv_path, index_col=0)
+    values = model_matrix_df.to_numpy(dtype=object)
+    rows, cols = np.nonzero(pd.notna(values))
+    model_ids, names = pd.factorize(values[rows, cols])
+
+    matrix = scipy.sparse.csr_matrix((model_ids + 1, (rows, cols)), shape=values.shape, dtype=np.int32)
+    return matrix, np.array(model_matrix_df.index, dtype=str), np.array(model_matrix_df.columns, dtype=str), np.array(names, dtype=str)
+
+
+def _checksum(matrix):
+    """Return a checksum of the model IDs of a store matrix."""
+    return zlib.crc32(np.ascontiguousarray(matrix.data, dtype=np.int32).tobytes())
+
+
+def save_model_store(matrix, row_labels, col_labels, names):
+    """Save the store built by build_model_store, every file replaced atomically."""
+    save_labeled_matrix(model_store_path, matrix, row_labels, col_labels)
+    replace_atomically(model_names_path,
+                       lambda f: np.savez_compressed(f, names=names, shape=np.array(matrix.shape),
+                                                     checksum=np.array(_checksum(matrix))))
+
+
+def _is_stale():
+    """Return True if the saved store is missing or older than the CSV."""
+    store_files = [model_store_path.with_name(f"{model_store_path.name}{suffix}.npz") for suffix in ("", "_labels")]
+    store_files.append(model_names_path)
+    if not all(path.exists() for path in store_files):
+        return True
+    return matrix_csv_path.stat().st_mtime > min(path.stat().st_mtime for path in store_files)
+
+
+class ModelStore:
+    """
+    Most flown aircraft models of all routes.
+
+    Args:
+        matrix (scipy.sparse.csr_matrix): Model ID + 1 of every route, 0 for routes without data.
+        row_labels (array-like): ICAO codes of the departure airports.
+        col_labels (array-like): ICAO codes of the destination airports.
+        names (array-like): Model names by model ID.
+    """
+
+    def __init__(self, matrix, row_labels, col_labels, names):
+        self.matrix = matrix.tocsr()
+        self.row_index = {code: i for i, code in enumerate(np.asarray(row_labels).tolist())}
+        self.col_index = {code: i for i, code in enumerate(np.asarray(col_labels).tolist())}
+        # Model ID + 1 indexes the names; 0 (no entry) becomes NaN like an empty CSV cell
+        self.names = np.array([np.nan] + list(names), dtype=object)
+
+    def model(self, departure_code, destination_code):
+        """Return the most flown models of a route, see models."""
+        return self.models([(departure_code, destination_code)])[0]
+
+    def models(self, routes):
+        """
+        Return the most flown models of many routes at once.
+
+        Args:
+            routes (list): (departure ICAO code, destination ICAO code) pairs.
+
+        Returns:
+            list: The model description of every route, NaN if the route has no entry and
+                  "No aircraft data for this route" if an airport is not in the table.
+        """
+        rows = np.array([self.row_index.get(departure, -1) for departure, _ in routes], dtype=np.int64)
+        cols = np.array([self.col_index.get(destination, -1) for _, destination in routes], dtype=np.int64)
+        known = (rows >= 0) & (cols >= 0)
+
+        result = np.full(len(routes), no_data, dtype=object)
+        if known.any():
+            model_ids = np.asarray(self.matrix[rows[known], cols[known]]).ravel()
+            result[known] = self.names[model_ids]
+        return result.tolist()
+
+
+def load_model_store():
+    """
+    Load the saved model store, or build it from the CSV in memory if it is outdated.
+
+    Returns:
+        ModelStore: The model store.
+    """
+    if not _is_stale():
+        matrix, row_labels, col_labels = load_labeled_matrix(model_store_path)
+        saved = np.load(model_names_path)
+        if ('checksum' in saved and matrix.shape == (len(row_labels), len(col_labels))
+                and tuple(saved['shape']) == matrix.shape and int(saved['checksum']) == _checksum(matrix)):
+            return ModelStore(matrix, row_labels, col_labels, saved['names'])
+
+    print(f"Building the model store in memory; run python model_store.py to save it to {model_store_path}.npz")
+    return ModelStore(*build_model_store())
+
+
+if __name__ == "__main__":
+    matrix, row_labels, col_labels, names = build_model_store()
+    save_model_store(matrix, row_labels, col_labels, names)
+    print(f"Saved {matrix.nnz} routes with {len(names)} distinct model descriptions to {model_store_path}.npz")
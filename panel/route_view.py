@@ -2,151 +2,200 @@ import plotly.graph_objects as go
 import airport_check  # Assuming airport_check is a module or script containing airport_location function
 
 #######################################
-# Create world map ####################
+# Route map ###########################
 #######################################
 
-# Create the blank world map
-fig = go.Figure()
-
-def initialize_map():
-    # Initialize the world map with the base configuration
-    fig.add_trace(go.Choropleth(
-        locations=[],  # No data for countries
-        z=[],  # No data for color scale
-    ))
-
-    fig.update_layout(
-        geo=dict(
-            showframe=True,
-            showcoastlines=True, coastlinecolor="lightgrey",
-            showland=True, landcolor="black",
-            showocean=True, oceancolor="dimgrey",
-            showlakes=True, lakecolor="black",
-            showcountries=True, countrycolor="lightgrey",
-        ),
-        margin=dict(l=5, r=5, t=5, b=5),
-        legend=dict(
-            y=0,  # Position the legend below the map
-            x=0.5,
-            xanchor='center',
-            yanchor='top'
-        ),
-    )
-
-initialize_map()
+"""
+    Each dashboard session owns its own RouteMap, so the markers and flight
+    lines of one user never appear on the map of another.
 
-#######################################
-# Functions ###########################
-#######################################
+    The map always has the same four traces: the blank base map, the
+    departure markers, the destination markers and the flight lines (one
+    line trace with the segments separated by None). Adding, changing or
+    removing a route only patches the coordinates of these traces in one
+    batch_update, so the Plotly pane sends a small restyle message instead
+    of the whole figure.
+"""
 
-# Initialize lists for departure, destination markers, and lines
-departure_markers = []
-destination_markers = []
-flight_lines = []
 
-# Function to retrieve airport location and add/update marker on map
-def add_airport_marker_departure(location):
+class RouteMap:
     """
-    Add or update the departure airport marker on the map.
+    World map with the departure and destination markers and flight lines of one session.
 
-    Args:
-        location (str): The ICAO code of the departure airport.
+    Markers are kept per route number: entering a new code for a route moves
+    its marker instead of adding another one.
     """
-    lat, lon = airport_check.airport_location(location)
-    if lat is not None and lon is not None:
-        # Add new departure marker
-        departure_marker = go.Scattergeo(
-            lon=[lon],
-            lat=[lat],
+
+    # Positions of the fixed traces in fig.data
+    departure_trace = 1
+    destination_trace = 2
+    flight_line_trace = 3
+
+    def __init__(self):
+        # Create the blank world map
+        self.fig = go.Figure()
+        # Route number -> (lon, lat, ICAO code) of the departure and destination markers
+        self.departure_markers = {}
+        self.destination_markers = {}
+        self.initialize_map()
+
+    def initialize_map(self):
+        # Initialize the world map with the base configuration
+        self.fig.add_trace(go.Choropleth(
+            locations=[],  # No data for countries
+            z=[],  # No data for color scale
+        ))
+
+        # Add the empty marker and line traces that are patched on every update
+        self.fig.add_trace(go.Scattergeo(
+            lon=[],
+            lat=[],
             mode='markers',
             marker=dict(
                 size=15,
                 color='green',
                 opacity=1,
             ),
-            name=f"Departure: {location}",  # Add ICAO code to legend
+            name="Departure",
             legendgroup='departure',
             legendrank=1,
-            showlegend=False,  # Ensure legend is shown
+            showlegend=False,
             hoverinfo='text',  # Display text when hovering
-            text=f"Departure: {location}"  # Custom text to display
-        )
-        fig.add_trace(departure_marker)
-        departure_markers.append(departure_marker)
-        
-        # Check if a corresponding destination marker exists and add a flight line
-        if len(departure_markers) == len(destination_markers):
-            add_flight_line()
-
-# Function to retrieve airport location and add/update marker on map
-def add_airport_marker_destination(location):
-    """
-    Add or update the destination airport marker on the map.
-
-    Args:
-        location (str): The ICAO code of the destination airport.
-    """
-    lat, lon = airport_check.airport_location(location)
-    if lat is not None and lon is not None:
-        # Add new destination marker
-        destination_marker = go.Scattergeo(
-            lon=[lon],
-            lat=[lat],
+            text=[]
+        ))
+        self.fig.add_trace(go.Scattergeo(
+            lon=[],
+            lat=[],
             mode='markers',
             marker=dict(
                 size=15,
                 color='orange',
                 opacity=0.9,
             ),
-            name=f"Destination: {location}",  # Add ICAO code to legend
+            name="Destination",
             legendgroup='destination',
             legendrank=2,
-            showlegend=False,  # Ensure legend is shown
+            showlegend=False,
             hoverinfo='text',  # Display text when hovering
-            text=f"Destination: {location}"  # Custom text to display
-        )
-        fig.add_trace(destination_marker)
-        destination_markers.append(destination_marker)
-        
-        # Check if a corresponding departure marker exists and add a flight line
-        if len(departure_markers) == len(destination_markers):
-            add_flight_line()
-
-# Function to add/update flight line between departure and destination
-def add_flight_line():
-    """
-    Add or update the flight line between the departure and destination airports on the map.
-    """
-    if len(departure_markers) > 0 and len(destination_markers) > 0:
-        departure_marker = departure_markers[-1]
-        destination_marker = destination_markers[-1]
-
-        departure_lat = departure_marker['lat'][0]
-        departure_lon = departure_marker['lon'][0]
-        destination_lat = destination_marker['lat'][0]
-        destination_lon = destination_marker['lon'][0]
-
-        # Add new flight line
-        flight_line = go.Scattergeo(
-            lon=[departure_lon, destination_lon],
-            lat=[departure_lat, destination_lat],
+            text=[]
+        ))
+        self.fig.add_trace(go.Scattergeo(
+            lon=[],
+            lat=[],
             mode='lines',
             line=dict(width=5, color='White'),
             showlegend=False,  # Do not show flight path in the legend
-            hoverinfo=None
+            hoverinfo='skip'
+        ))
+
+        self.fig.update_layout(
+            geo=dict(
+                showframe=True,
+                showcoastlines=True, coastlinecolor="lightgrey",
+                showland=True, landcolor="black",
+                showocean=True, oceancolor="dimgrey",
+                showlakes=True, lakecolor="black",
+                showcountries=True, countrycolor="lightgrey",
+            ),
+            margin=dict(l=5, r=5, t=5, b=5),
+            legend=dict(
+                y=0,  # Position the legend below the map
+                x=0.5,
+                xanchor='center',
+                yanchor='top'
+            ),
         )
-        fig.add_trace(flight_line)
-        flight_lines.append(flight_line)
-
-# Function to clear existing points on the map
-def reset_map():
-    global departure_markers, destination_markers, flight_lines
-    # Clear all markers and lines
-    fig.data = []
-    # Reset lists of markers and lines
-    departure_markers = []
-    destination_markers = []
-    flight_lines = []
-    # Reinitialize the base map
-    initialize_map()
 
+    # Function to retrieve airport location and add/update marker on map
+    def add_airport_marker_departure(self, location, route=1):
+        """
+        Add or update the departure airport marker on the map.
+
+        Args:
+            location (str): The ICAO code of the departure airport.
+            route (int): The number of the route.
+        """
+        lat, lon = airport_check.airport_location(location)
+        if lat is not None and lon is not None:
+            self.departure_markers[route] = (lon, lat, location)
+            self.update_traces()
+
+    # Function to retrieve airport location and add/update marker on map
+    def add_airport_marker_destination(self, location, route=1):
+        """
+        Add or update the destination airport marker on the map.
+
+        Args:
+            location (str): The ICAO code of the destination airport.
+            route (int): The number of the route.
+        """
+        lat, lon = airport_check.airport_location(location)
+        if lat is not None and lon is not None:
+            self.destination_markers[route] = (lon, lat, location)
+            self.update_traces()
+
+    def remove_departure(self, route=1):
+        """
+        Remove the departure airport marker and the flight line of a route from the map.
+
+        Args:
+            route (int): The number of the route.
+        """
+        if self.departure_markers.pop(route, None) is not None:
+            self.update_traces()
+
+    def remove_destination(self, route=1):
+        """
+        Remove the destination airport marker and the flight line of a route from the map.
+
+        Args:
+            route (int): The number of the route.
+        """
+        if self.destination_markers.pop(route, None) is not None:
+            self.update_traces()
+
+    def flight_lines(self):
+        """
+        Get the flight lines of all routes with a departure and a destination marker.
+
+        Returns:
+            tuple: (lon, lat) lists of all line segments, separated by None.
+        """
+        lon, lat = [], []
+        for route, (departure_lon, departure_lat, _) in sorted(self.departure_markers.items()):
+            if route in self.destination_markers:
+                destination_lon, destination_lat, _ = self.destination_markers[route]
+                lon += [departure_lon, destination_lon, None]
+                lat += [departure_lat, destination_lat, None]
+        return lon, lat
+
+    # Function to patch the markers and flight lines in place
+    def update_traces(self):
+        """
+        Write the current markers and flight lines into the fixed traces in one update.
+        """
+        departures = [self.departure_markers[route] for route in sorted(self.departure_markers)]
+        destinations = [self.destination_markers[route] for route in sorted(self.destination_markers)]
+        line_lon, line_lat = self.flight_lines()
+
+        with self.fig.batch_update():
+            departure_trace = self.fig.data[self.departure_trace]
+            departure_trace.lon = [lon for lon, _, _ in departures]
+            departure_trace.lat = [lat for _, lat, _ in departures]
+            departure_trace.text = [f"Departure: {location}" for _, _, location in departures]
+
+            destination_trace = self.fig.data[self.destination_trace]
+            destination_trace.lon = [lon for lon, _, _ in destinations]
+            destination_trace.lat = [lat for _, lat, _ in destinations]
+            destination_trace.text = [f"Destination: {location}" for _, _, location in destinations]
+
+            flight_line_trace = self.fig.data[self.flight_line_trace]
+            flight_line_trace.lon = line_lon
+            flight_line_trace.lat = line_lat
+
+    # Function to clear existing points on the map
+    def reset_map(self):
+        # Remove all markers and lines, the traces themselves are kept
+        self.departure_markers = {}
+        self.destination_markers = {}
+        self.update_traces()
@@ -0,0 +1,198 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+import sys
+from pathlib import Path
+import numpy as np
+import scipy.sparse
+
+#######################################
+# PATHS ###############################
+#######################################
+
+# Ensure the correct module path is added
+current_directory = Path(__file__).resolve().parent
+api_aerodatabox_path = current_directory.parents[0] / 'api_aerodatabox'
+sys.path.insert(0, str(api_aerodatabox_path))
+
+from airport_index import load_labeled_matrix, save_labeled_matrix
+
+seat_matrices_path = current_directory / "data" / "seat_matrices"
+seat_tensor_path = seat_matrices_path / "seat_tensor"
+
+months = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+
+# A month is counted as 30 days in annual totals
+days_per_month = 30
+
+
+#######################################
+# Seat tensor #########################
+#######################################
+
+"""
+    The monthly seat matrices data/seat_matrices/{month}.npz each have their
+    own row and column labels. The seat tensor aligns all of them onto one
+    sorted airport index and stacks them into a single CSR matrix of shape
+    (12 * n, n): rows month * n to (month + 1) * n hold the seats of that
+    month. It is saved like the monthly matrices, as
+    data/seat_matrices/seat_tensor.npz with seat_tensor_labels.npz.
+
+    Annual totals (the sum of all months, 30 days each) and the symmetric
+    totals of round trips (A->B + B->A) are precomputed when the tensor is
+    loaded, so every query is a single indexed read.
+
+    The tensor is only saved by running this module. Loading never writes
+    to the data folder: an outdated or missing tensor is built in memory.
+
+    Usage: python seat_tensor.py rebuilds the tensor from the monthly matrices.
+"""
+
+
+def build_seat_tensor():
+    """
+    Align the monthly seat matrices onto one airport index and stack them.
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix of shape (12 * n, n), sorted ICAO codes of the n airports).
+    """
+    monthly = []
+    for month in months:
+        matrix, row_labels, col_labels = load_labeled_matrix(seat_matrices_path / month)
+        monthly.append((matrix.tocoo(), row_labels, col_labels))
+
+    codes = np.unique(np.concatenate([np.concatenate([rows, cols]) for _, rows, cols in monthly]).astype(str))
+    n = len(codes)
+
+    rows, cols, data = [], [], []
+    for m, (matrix, row_labels, col_labels) in enumerate(monthly):
+        # Translate the month's own label positions into positions of the unified index
+        row_position = np.searchsorted(codes, np.asarray(row_labels, dtype=str))
+        col_position = np.searchsorted(codes, np.asarray(col_labels, dtype=str))
+        rows.append(m * n + row_position[matrix.row])
+        cols.append(col_position[matrix.col])
+        data.append(matrix.data)
+
+    tensor = scipy.sparse.csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+                                     shape=(len(months) * n, n))
+    tensor.sum_duplicates()
+    return tensor, codes
+
+
+def _is_stale():
+    """Return True if the saved tensor is missing or older than any monthly matrix."""
+    tensor_files = [seat_tensor_path.with_name(f"{seat_tensor_path.name}{suffix}.npz") for suffix in ("", "_labels")]
+    if not all(path.exists() for path in tensor_files):
+        return True
+    built = min(path.stat().st_mtime for path in tensor_files)
+    return any((seat_matrices_path / f"{month}{suffix}.npz").stat().st_mtime > built
+               for month in months for suffix in ("", "_labels"))
+
+
+class SeatTensor:
+    """
+    Seats between all airport pairs for every month, on one airport index.
+
+    Args:
+        tensor (scipy.sparse.csr_matrix): Stacked monthly seat matrices of shape (12 * n, n).
+        codes (array-like): ICAO codes of the n airports.
+    """
+
+    def __init__(self, tensor, codes):
+        self.codes = np.asarray(codes, dtype=str)
+        self.index = {code: i for i, code in enumerate(self.codes.tolist())}
+        self.tensor = tensor.tocsr()
+
+        n = len(self.codes)
+        self.monthly = [self.tensor[m * n:(m + 1) * n] for m in range(len(months))]
+        self.annual = self.season(months)
+        self.annual_symmetric = (self.annual + self.annual.T).tocsr()
+
+    def month(self, month):
+        """Return the seat matrix of a month (e.g., "January")."""
+        return self.monthly[months.index(month)]
+
+    def season(self, season_months):
+        """
+        Return the seats of several months, 30 days each, e.g. of a summer season.
+
+        Args:
+            season_months (list): Month names, e.g. ["June", "July", "August"].
+
+        Returns:
+            scipy.sparse.csr_matrix: The summed seats of all airport pairs.
+        """
+        total = scipy.sparse.csr_matrix((len(self.codes), len(self.codes)))
+        for month in season_months:
+            total = total + self.month(month) * days_per_month
+        return total.tocsr()
+
+    def matrix(self, time_of_year_value, round_trip=False):
+        """
+        Get the seats of all airport pairs.
+
+        Args:
+            time_of_year_value (str): A month (e.g., "January") or "Whole year".
+            round_trip (bool): Whether to add the seats of the return trips.
+
+        Returns:
+            scipy.sparse.csr_matrix: The seats, rows and columns in the order of codes.
+        """
+        if time_of_year_value == "Whole year":
+            return self.annual_symmetric if round_trip else self.annual
+        matrix = self.month(time_of_year_value)
+        return (matrix + matrix.T).tocsr() if round_trip else matrix
+
+    def value(self, departure_code, destination_code, time_of_year_value, round_trip=False):
+        """
+        Get the seats of a route.
+
+        Args:
+            departure_code (str): The ICAO code of the departure airport.
+            destination_code (str): The ICAO code of the destination airport.
+            time_of_year_value (str): A month (e.g., "January") or "Whole year".
+            round_trip (bool): Whether to add the seats of the return trip.
+
+        Returns:
+            float: The seats, 0 if an airport is not in the index.
+        """
+        departure_idx = self.index.get(departure_code)
+        destination_idx = self.index.get(destination_code)
+        if departure_idx is None or destination_idx is None:
+            return 0
+
+        if time_of_year_value == "Whole year":
+            if round_trip:
+                return self.annual_symmetric[departure_idx, destination_idx]
+            return self.annual[departure_idx, destination_idx]
+
+        matrix = self.month(time_of_year_value)
+        if round_trip:
+            return matrix[departure_idx, destination_idx] + matrix[destination_idx, departure_idx]
+        return matrix[departure_idx, destination_idx]
+
+
+def load_seat_tensor():
+    """
+    Load the saved seat tensor, or build it in memory if it is outdated.
+
+    The saved tensor is also rebuilt in memory if its matrix and labels do not match, e.g. when
+    they were read while python seat_tensor.py was replacing them.
+
+    Returns:
+        SeatTensor: The seat tensor.
+    """
+    if not _is_stale():
+        tensor, codes, _ = load_labeled_matrix(seat_tensor_path)
+        if tensor.shape == (len(months) * len(codes), len(codes)):
+            return SeatTensor(tensor, codes)
+
+    print(f"Building the seat tensor in memory; run python seat_tensor.py to save it to {seat_tensor_path}.npz")
+    return SeatTensor(*build_seat_tensor())
+
+
+if __name__ == "__main__":
+    tensor, codes = build_seat_tensor()
+    save_labeled_matrix(seat_tensor_path, tensor, codes)
+    print(f"Saved seat tensor of {len(codes)} airports and {tensor.nnz} entries to {seat_tensor_path}.npz")
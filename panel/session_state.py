@@ -0,0 +1,82 @@
+#######################################
+# IMPORTS #############################
+#######################################
+
+import threading
+import weakref
+import pandas as pd
+import panel as pn
+
+from route_view import RouteMap
+
+
+#######################################
+# Session state #######################
+#######################################
+
+"""
+    Mutable state of the Route View, one RouteSession per browser session.
+
+    Read-only data (seat tensor, model store, GDP table, airport registry)
+    is loaded once per process by forecast_display and data_service and
+    shared by all sessions. Everything a user changes, i.e. the entered
+    routes, their forecasts and the route map, lives in the RouteSession of
+    the session's document (pn.state.curdoc), so simultaneous users do not
+    overwrite each other's routes. A session's state is dropped together
+    with its document.
+"""
+
+
+class RouteSession:
+    """
+    Routes, forecasts and route map of one dashboard session.
+
+    Attributes:
+        route_inputs (list): (departure, destination) input widgets of every route.
+        route_dfs (dict): Route number -> forecast of every route with both ICAO codes.
+        final_df (pd.DataFrame): The merged forecast of all routes.
+        icao (list): Departure and destination ICAO codes of the entered routes, in pairs.
+        aircraft_type_df (pd.DataFrame): The most used aircraft type of every route.
+        route_map (RouteMap): The map with the markers and flight lines of the routes.
+        pending_routes (set): Numbers of the routes whose inputs changed since the last update.
+        pending_settings (set): Changed forecast settings, "seats" (timeframe or legs) or "pax" (load factor).
+        pending_update (PeriodicCallback): The one-shot callback applying the pending changes, None if none
+                                           is scheduled; it is restarted by every further change.
+    """
+
+    def __init__(self):
+        self.route_inputs = []
+        self.route_dfs = {}
+        self.final_df = None
+        self.icao = []
+        self.aircraft_type_df = pd.DataFrame(columns=['Most Used Aircraft Type'])
+        self.route_map = RouteMap()
+        self.pending_routes = set()
+        self.pending_settings = set()
+        self.pending_update = None
+
+
+_sessions = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+_default_session = None
+
+
+def get_session():
+    """
+    Get the state of the current session, creating it on first use.
+
+    Returns:
+        RouteSession: The state of pn.state.curdoc, or a single process-wide
+                      state when the dashboard runs outside of a server.
+    """
+    global _default_session
+    document = pn.state.curdoc
+    with _lock:
+        if document is None:
+            if _default_session is None:
+                _default_session = RouteSession()
+            return _default_session
+        session = _sessions.get(document)
+        if session is None:
+            session = _sessions[document] = RouteSession()
+        return session
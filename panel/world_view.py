@@ -3,20 +3,9 @@
 #######################################
 
 
+import numpy as np
 import plotly.graph_objects as go
-import sys
-from pathlib import Path
-
-#######################################
-# Paths ###############################
-#######################################
-
-# Ensure the correct module path is added
-current_directory = Path(__file__).resolve().parent
-api_aerodatabox_path = current_directory.parents[0] / 'api_aerodatabox'
-sys.path.insert(0, str(api_aerodatabox_path))
-
-import data_transformation_pandas
+import data_service
 
 
 #######################################
@@ -69,7 +58,7 @@ def create_flight_connections_plot(fig, plot_whole_year, month=None):
         go.Figure: The updated Plotly figure object with all flight connections plotted.
     """
     # Plotting
-    flight_data_df, daily_flights_df = data_transformation_pandas.process_flight_connections("Year")
+    flight_data_df, daily_flights_df = data_service.flight_connections("Year")
 
     # Calculate the maximum value of 'daily_flights' column
     max_daily_flights = daily_flights_df['number_of_total_flights'].max()
@@ -94,15 +83,27 @@ def create_flight_connections_plot(fig, plot_whole_year, month=None):
                         (flight_data_df['averageDailyFlights'].max() - flight_data_df['averageDailyFlights'].min()) *
                         (max_opacity - min_opacity)) + min_opacity
 
-    # Plot all the different connections first
-    for i in range(len(flight_data_df)):
+    # Group the connections into opacity classes, rounding the scaled opacities up to steps of 0.1 so
+    # that even the least flown connections stay visible; if all connections have the same number of
+    # flights, the scaling is undefined (NaN) and they are drawn fully opaque
+    opacity_steps = 10
+    opacity_classes = (np.ceil(scaled_opacities * opacity_steps) / opacity_steps).clip(lower=1 / opacity_steps)
+    opacity_classes = opacity_classes.fillna(max_opacity)
+
+    # Plot all the different connections first, one trace of NaN-separated lines per opacity class
+    # (float32 coordinates halve the payload sent to the browser)
+    for opacity, connections in flight_data_df.groupby(opacity_classes):
+        lon = np.full(3 * len(connections), np.nan, dtype=np.float32)
+        lat = np.full(3 * len(connections), np.nan, dtype=np.float32)
+        lon[0::3], lon[1::3] = connections['lon_departure'], connections['lon_destination']
+        lat[0::3], lat[1::3] = connections['lat_departure'], connections['lat_destination']
         fig.add_trace(
             go.Scattergeo(
-                lon=[flight_data_df['lon_departure'][i], flight_data_df['lon_destination'][i]],
-                lat=[flight_data_df['lat_departure'][i], flight_data_df['lat_destination'][i]],
+                lon=lon,
+                lat=lat,
                 mode='lines',
                 line=dict(width=1, color='white'),
-                opacity=scaled_opacities[i],  # Use scaled opacities if already defined
+                opacity=opacity,
                 hoverinfo='skip',
                 showlegend=False,
             )